@@ -3,16 +3,30 @@ import argparse
 import sys
 import os
 import inspect
+import mmap
+import operator
 import re
 import struct
 import codecs
+import functools
+import hashlib
+import itertools
+import time
+import zlib
 import chardet
+from array import array
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from difflib import SequenceMatcher
 import ruamel.yaml
 from ruamel.yaml.scalarstring import PreservedScalarString
 from ruamel.yaml.scalarstring import DoubleQuotedScalarString
 import section_constants as section
 import polib
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 """
 From powershell 6.1.7600.16385 you may see question marks rather then the Korean or Chinese text on windows 7.
@@ -20,6 +34,10 @@ However, running esolang with powershell 7 on windows 10 the docstrings should p
 On windows 7 in GitBash 2.35.1.2 you may see a UnicodeEncodeError charmap error.
 
 The issue is related to the encoding used when printing Unicode characters in different terminal environments.
+
+NumPy is optional. When it is installed, diffEnglishLangFiles computes its similarity prefilter for a
+block of keys in one vectorized pass; without it the same bounds are computed in Python, with the same
+results. Everything else, including the LangTable columns, uses array and does not need NumPy.
 """
 # List to hold information about callable functions
 callable_functions = []
@@ -54,13 +72,25 @@ def main():
     parser.add_argument("--help-functions", action="store_true", help="Print available functions and their docstrings.")
     parser.add_argument("--list-functions", action="store_true", help="List available functions without docstrings.")
     parser.add_argument("--usage", action="store_true", help="Display usage information.")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Number of worker processes for functions that accept a jobs argument.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or write the .langcache directory.")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Directory for parsed .lang caches instead of .langcache next to each file.")
     parser.add_argument("function", nargs="?", help="The name of the function to execute.")
     parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the function.")
 
     args = parser.parse_args()
 
+    global useLangCache, langCacheDir
+    if args.no_cache:
+        useLangCache = False
+    if args.cache_dir:
+        langCacheDir = args.cache_dir
+
     if args.usage:
-        print("Usage: esokr.py function [args [args ...]]")
+        print("Usage: esokr.py [--jobs N] [--no-cache] [--cache-dir DIR] function [args [args ...]]")
         print("       esokr.py --help-functions, or help")
         print("       esokr.py --list-functions, or list")
     elif args.help_functions or args.function == "help":
@@ -74,10 +104,13 @@ def main():
         for func in callable_functions:
             if func.__name__ == function_name:
                 func_args = args.args
+                func_kwargs = {}
+                if args.jobs is not None and 'jobs' in inspect.signature(func).parameters:
+                    func_kwargs['jobs'] = args.jobs
                 if func == addIndexToLangFile and len(func_args) < 2:
                     print("Usage: {} <txtFilename> <idFilename>".format(func.__name__))
                 else:
-                    func(*func_args)
+                    func(*func_args, **func_kwargs)
                 break
         else:
             print("Unknown function: {}".format(function_name))
@@ -122,9 +155,84 @@ reFontTag = re.compile(r'^\[Font:(.+?)\] = "(.+?)"')
 # Matches a gender or neutral suffix in the format ^M, ^F, ^m, ^f, ^N, or ^n
 reGenderSuffix = re.compile(r'\^[MmFfNn]')
 
+# Line kinds returned by parseStrLine
+STR_LINE_EMPTY = 'empty'
+STR_LINE_UNTAGGED = 'untagged'
+STR_LINE_TAGGED = 'tagged'
+
+# A classified .str line. kind is one of the STR_LINE_ constants or None, key, tag and value
+# hold the groups of the matching expression and isFont is True when reFontTag matches.
+StrLine = namedtuple('StrLine', 'kind key tag value isFont')
+
+
+def parseStrLineRegex(line):
+    """Classify a .str line with reEmptyString, reClientUntaged, reClientTaged and reFontTag."""
+    isFont = reFontTag.match(line) is not None
+    maEmptyString = reEmptyString.match(line)
+    if maEmptyString:
+        return StrLine(STR_LINE_EMPTY, maEmptyString.group(1), None, '', isFont)
+    maClientUntaged = reClientUntaged.match(line)
+    if maClientUntaged:
+        return StrLine(STR_LINE_UNTAGGED, maClientUntaged.group(1), None, maClientUntaged.group(2) or '', isFont)
+    maClientTaged = reClientTaged.match(line)
+    if maClientTaged:
+        return StrLine(STR_LINE_TAGGED, maClientTaged.group(1), maClientTaged.group(2), maClientTaged.group(3), isFont)
+    return StrLine(None, None, None, None, isFont)
+
+
+def parseStrLine(line):
+    """
+    Classify a line of a .str file in a single scan.
+
+    Gives the same result as parseStrLineRegex, which tries reEmptyString, reClientUntaged and
+    reClientTaged in turn, without the lookahead of reClientUntaged rescanning the value. The key
+    ends at the first '] = "' and the value is checked with string operations. Lines with a quote
+    inside the value, where the expressions could backtrack to a later '] = "', are passed to
+    parseStrLineRegex.
+
+    Args:
+        line (str): One line of the file, with or without its newline.
+
+    Returns:
+        StrLine: The kind of line with its key, tag and value, and whether it is a font line.
+    """
+    text = line[:-1] if line.endswith('\n') else line
+    if not text.startswith('['):
+        return StrLine(None, None, None, None, False)
+    if '\n' in text:
+        return parseStrLineRegex(line)
+
+    isFont = False
+    if text.startswith('[Font:'):
+        fontPos = text.find('] = "', 7)
+        isFont = fontPos >= 0 and text.find('"', fontPos + 6) >= 0
+
+    pos = text.find('] = "', 2)
+    if pos < 0:
+        return StrLine(None, None, None, None, isFont)
+    rest = text[pos + 5:]
+    if rest == '"':
+        return StrLine(STR_LINE_EMPTY, text[1:pos], None, '', isFont)
+    if not rest.endswith('"'):
+        return StrLine(None, None, None, None, isFont)
+    body = rest[:-1]
+    if '"' in body:
+        return parseStrLineRegex(line)
+
+    # Without quotes the value is only invalid if it ends in an unpaired backslash
+    if (len(body) - len(body.rstrip('\\'))) % 2:
+        return StrLine(None, None, None, None, isFont)
+    if body.startswith('{C:') or body.startswith('{P:'):
+        close = body.find('}', 4)
+        if close < 0:
+            return StrLine(None, None, None, None, isFont)
+        return StrLine(STR_LINE_TAGGED, text[1:pos], body[:close + 1], body[close + 1:], isFont)
+    if '{C:' in body or '{P:' in body:
+        return StrLine(None, None, None, None, isFont)
+    return StrLine(STR_LINE_UNTAGGED, text[1:pos], None, body, isFont)
+
+
 # Global Dictionaries ---------------------------------------------------------
-textUntranslatedLiveDict = {}
-textUntranslatedPTSDict = {}
 textTranslatedDict = {}
 textUntranslatedDict = {}
 textClientDict = {}
@@ -139,7 +247,32 @@ translatedFileIndexes = {}
 translatedFileStrings = {}
 
 
-# Helper for escaped chars ----------------------------------------------------
+# Sections --------------------------------------------------------------------
+class SectionRegistry:
+    """Reverse lookups over section_constants.section_info, built once.
+
+    keysById maps a sectionId to its section key, idsByName maps a section key or
+    sectionName to its sectionId. When two keys share an ID the first one wins.
+    """
+
+    def __init__(self, section_info):
+        self.keysById = {}
+        self.idsByName = {}
+        for key, value in section_info.items():
+            self.keysById.setdefault(value['sectionId'], key)
+            self.idsByName.setdefault(key, value['sectionId'])
+            self.idsByName.setdefault(value['sectionName'], value['sectionId'])
+
+    def keyById(self, section_id):
+        return self.keysById.get(section_id)
+
+    def idByName(self, section_name):
+        return self.idsByName.get(section_name)
+
+
+sectionRegistry = SectionRegistry(section.section_info)
+
+
 def get_section_id(section_key):
     return section.section_info.get(section_key, {}).get('sectionId', None)
 
@@ -149,12 +282,10 @@ def get_section_name(section_key):
 
 
 def get_section_key_by_id(section_id):
-    for key, value in section.section_info.items():
-        if value['sectionId'] == section_id:
-            return key
-    return None
+    return sectionRegistry.keyById(section_id)
 
 
+# Helper for escaped chars ----------------------------------------------------
 def escape_lua_string(text):
     return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace(r'\\\"', r'\"')
 
@@ -226,19 +357,40 @@ def restore_escaped_sequences(text):
     )
 
 
+def decodeLangString(raw_bytes):
+    """Decode a string from a .lang file with its newlines replaced by placeholders."""
+    return bytes(preserve_escaped_sequences_bytes(raw_bytes)).decode("utf8", errors="replace")
+
+
+def encodeLangString(text):
+    """Encode tagged text for a .lang file, turning escaped newlines back into newlines."""
+    return text.replace("\\n", "\n").encode("utf8")
+
+
+def formatTaggedLine(sectionId, sectionIndex, stringIndex, raw_bytes):
+    """Format a .lang string as a {{sectionId-sectionIndex-stringIndex:}}text line."""
+    formatted = "{{{{{}-{}-{}:}}}}{}\n".format(sectionId, sectionIndex, stringIndex, decodeLangString(raw_bytes))
+    return restore_escaped_sequences(formatted)
+
+
+def sectionOutputName(section_id):
+    """Return <sectionId>_<sectionName>.txt for named sections and <sectionId>.txt otherwise."""
+    section_key = get_section_key_by_id(section_id)
+    if section_key and not re.match(r'section_unknown_\d+$', section_key):
+        return "{}_{}.txt".format(section_id, section_key)
+    return "{}.txt".format(section_id)
+
+
 def isTranslatedText(line):
     if line is None:
         return False
     return any(ord(char) > 127 for char in line)
 
 
-# Read and write binary structs
+# Read binary structs
 def readUInt32(file): return struct.unpack('>I', file.read(4))[0]
 
 
-def writeUInt32(file, value): file.write(struct.pack('>I', value))
-
-
 # Conversion ------------------------------------------------------------------
 @mainFunction
 def addIndexToLangFile(txtFilename, idFilename):
@@ -361,8 +513,237 @@ def removeIndexToLangFile(txtFilename):
             out.write(lineOut)
 
 
+# Hangul remapping ------------------------------------------------------------
+# Unicode blocks covered by the mapping
+hangulBlocks = [
+    (0x1100, 0x11FF, 'Hangul Jamo'),
+    (0x3130, 0x318F, 'Hangul Compatibility Jamo'),
+    (0xAC00, 0xD7AF, 'Hangul Syllables'),
+]
+
+# (first, last, offset) code point ranges moved by koreanToEso, esoToKorean applies the
+# reverse. They are the ranges shifted by the original UTF-8 byte offsets, which leave
+# U+3130, U+3140, U+3170-317F and U+D7AD-D7AF untouched.
+hangulEsoRanges = [
+    (0x1100, 0x11FF, 0x4D00),  # Hangul Jamo -> U+5E00
+    (0x3131, 0x313F, 0x2DD0),  # Hangul Compatibility Jamo -> U+5F01
+    (0x3141, 0x316F, 0x2DD0),
+    (0x3180, 0x318F, 0x2DD0),
+    (0xAC00, 0xD7AC, -0x3E00),  # Hangul Syllables -> U+6E00
+]
+
+# Bytes read per chunk when converting files
+conversionChunkSize = 1 << 20
+
+
+@functools.lru_cache(maxsize=None)
+def buildHangulTranslateTables():
+    """Build the str.translate tables for koreanToEso and esoToKorean from hangulEsoRanges.
+
+    Each table is an array('H') indexed by code point, so str.translate and the per character
+    helpers do a plain index instead of a dict lookup. Code points past the end of a table are
+    left unchanged. The Korean table is generated from the ESO table, so the two directions
+    cannot disagree. The tables are built once per process.
+    """
+    targets = [(first + offset, last + offset) for first, last, offset in hangulEsoRanges]
+    for first, last, offset in hangulEsoRanges:
+        for targetFirst, targetLast in targets:
+            if first <= targetLast and targetFirst <= last:
+                raise ValueError("Hangul range U+{:04X}-{:04X} overlaps an ESO range".format(first, last))
+
+    toEso = array('H', range(max(last for first, last, offset in hangulEsoRanges) + 1))
+    toKorean = array('H', range(max(last for first, last in targets) + 1))
+    for first, last, offset in hangulEsoRanges:
+        toEso[first:last + 1] = array('H', range(first + offset, last + offset + 1))
+        toKorean[first + offset:last + offset + 1] = array('H', range(first, last + 1))
+    return toEso, toKorean
+
+
+koreanToEsoTable, esoToKoreanTable = buildHangulTranslateTables()
+
+
+def koreanToEsoChar(char):
+    """Return the ESO range character for one Korean character."""
+    codePoint = ord(char)
+    if codePoint < len(koreanToEsoTable):
+        return chr(koreanToEsoTable[codePoint])
+    return char
+
+
+def esoToKoreanChar(char):
+    """Return the Korean character for one ESO range character."""
+    codePoint = ord(char)
+    if codePoint < len(esoToKoreanTable):
+        return chr(esoToKoreanTable[codePoint])
+    return char
+
+
+def legacyKoreanToEsoValue(temp):
+    """The UTF-8 byte offsets koreanToEso used before hangulEsoRanges, kept as a reference."""
+    if temp >= 0xE18480 and temp <= 0xE187BF:
+        temp = temp + 0x43400
+    elif temp > 0xE384B0 and temp <= 0xE384BF:
+        temp = temp + 0x237D0
+    elif temp > 0xE38580 and temp <= 0xE3868F:
+        temp = temp + 0x23710
+    elif temp >= 0xEAB080 and temp <= 0xED9EAC:
+        if temp >= 0xEAB880 and temp <= 0xEABFBF:
+            temp = temp - 0x33800
+        elif temp >= 0xEBB880 and temp <= 0xEBBFBF:
+            temp = temp - 0x33800
+        elif temp >= 0xECB880 and temp <= 0xECBFBF:
+            temp = temp - 0x33800
+        else:
+            temp = temp - 0x3F800
+    return temp
+
+
+def legacyEsoToKoreanValue(temp):
+    """The UTF-8 byte offsets esoToKorean used before hangulEsoRanges, kept as a reference."""
+    if temp >= 0xE5B880 and temp <= 0xE5BBBF:
+        temp = temp - 0x43400
+    elif temp > 0xE5BC80 and temp <= 0xE5BC8F:
+        temp = temp - 0x237D0
+    elif temp > 0xE5BC90 and temp <= 0xE5BD9F:
+        temp = temp - 0x23710
+    elif temp >= 0xE6B880 and temp <= 0xE9A6AC:
+        if temp >= 0xE78080 and temp <= 0xE787BF:
+            temp = temp + 0x33800
+        elif temp >= 0xE88080 and temp <= 0xE887BF:
+            temp = temp + 0x33800
+        elif temp >= 0xE98080 and temp <= 0xE987BF:
+            temp = temp + 0x33800
+        else:
+            temp = temp + 0x3F800
+    return temp
+
+
+def legacyConvertChar(char, shiftValue):
+    """Apply one of the legacy byte offset functions to a character, or None if the result is not valid UTF-8."""
+    encoded = char.encode('utf8')
+    value = shiftValue(int.from_bytes(encoded, "big"))
+    try:
+        return value.to_bytes(len(encoded), byteorder='big').decode('utf8')
+    except (OverflowError, UnicodeDecodeError):
+        return None
+
+
+def convertHangulFile(inputFilename, outputFilename, table, jobs=1):
+    """Remap a UTF-8 text file with a translate table, one large chunk at a time.
+
+    Multi-byte sequences split across chunks are held back by the incremental decoder.
+    With jobs greater than 1 the file is split on line boundaries and the chunks are
+    converted in that many worker processes, then written back in order.
+    """
+    jobs = int(jobs)
+    if jobs > 1:
+        convertHangulFileParallel(inputFilename, outputFilename, table, jobs)
+        return
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(inputFilename, 'rb') as textIns:
+        with open(outputFilename, 'w', encoding="utf8") as out:
+            while True:
+                chunk = textIns.read(conversionChunkSize)
+                out.write(decoder.decode(chunk, final=not chunk).translate(table))
+                if not chunk:
+                    break
+
+
+def readLineChunks(inputFilename, chunkSize):
+    """Yield blocks of about chunkSize bytes from a file, each ending on a line boundary."""
+    with open(inputFilename, 'rb') as textIns:
+        remainder = b''
+        while True:
+            chunk = textIns.read(chunkSize)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            lineEnd = chunk.rfind(b'\n') + 1
+            if lineEnd == 0:
+                remainder = chunk
+                continue
+            remainder = chunk[lineEnd:]
+            yield chunk[:lineEnd]
+        if remainder:
+            yield remainder
+
+
+def convertHangulChunk(chunk, toEso):
+    """Worker for convertHangulFileParallel: decode and remap one block of lines."""
+    return chunk.decode('utf8').translate(koreanToEsoTable if toEso else esoToKoreanTable)
+
+
+def convertHangulFileParallel(inputFilename, outputFilename, table, jobs):
+    if table is koreanToEsoTable:
+        toEso = True
+    elif table is esoToKoreanTable:
+        toEso = False
+    else:
+        raise ValueError("Parallel conversion only supports koreanToEsoTable and esoToKoreanTable")
+    # Several chunks per worker keep every process busy until the end of the file
+    chunkSize = os.path.getsize(inputFilename) // (jobs * 4)
+    chunkSize = max(conversionChunkSize // 4, min(conversionChunkSize * 4, chunkSize))
+    chunks = readLineChunks(inputFilename, chunkSize)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        with open(outputFilename, 'w', encoding="utf8") as out:
+            for text in executor.map(convertHangulChunk, chunks, itertools.repeat(toEso)):
+                out.write(text)
+
+
+# "esokr" codec: decoding reads text stored in the ESO range as Korean, encoding
+# writes Korean text into the ESO range, e.g. open('kr.lang.txt', encoding='esokr').
+def esokrEncode(input, errors='strict'):
+    return input.translate(koreanToEsoTable).encode('utf-8', errors), len(input)
+
+
+def esokrDecode(input, errors='strict'):
+    text, consumed = codecs.utf_8_decode(input, errors, True)
+    return text.translate(esoToKoreanTable), consumed
+
+
+class EsoKrIncrementalEncoder(codecs.IncrementalEncoder):
+    def encode(self, input, final=False):
+        return input.translate(koreanToEsoTable).encode('utf-8', self.errors)
+
+
+class EsoKrIncrementalDecoder(codecs.BufferedIncrementalDecoder):
+    """Decoder that keeps a multi-byte sequence split across chunks until the rest arrives."""
+
+    def _buffer_decode(self, input, errors, final):
+        text, consumed = codecs.utf_8_decode(input, errors, final)
+        return text.translate(esoToKoreanTable), consumed
+
+
+class EsoKrStreamWriter(codecs.StreamWriter):
+    def encode(self, input, errors='strict'):
+        return esokrEncode(input, errors)
+
+
+class EsoKrStreamReader(codecs.StreamReader):
+    def decode(self, input, errors='strict'):
+        text, consumed = codecs.utf_8_decode(input, errors, False)
+        return text.translate(esoToKoreanTable), consumed
+
+
+def searchEsoKrCodec(name):
+    if name != 'esokr':
+        return None
+    return codecs.CodecInfo(
+        name='esokr',
+        encode=esokrEncode,
+        decode=esokrDecode,
+        incrementalencoder=EsoKrIncrementalEncoder,
+        incrementaldecoder=EsoKrIncrementalDecoder,
+        streamwriter=EsoKrStreamWriter,
+        streamreader=EsoKrStreamReader,
+    )
+
+
+codecs.register(searchEsoKrCodec)
+
+
 @mainFunction
-def koreanToEso(txtFilename):
+def koreanToEso(txtFilename, jobs=1):
     """
     Convert Korean UTF-8 encoded text to Chinese UTF-8 encoded text with byte offset.
 
@@ -373,10 +754,13 @@ def koreanToEso(txtFilename):
 
     Args:
         txtFilename (str): The filename of the source text file containing Korean UTF-8 encoded text.
+        jobs (int): Number of worker processes. With more than 1 the file is converted in line-aligned
+                    chunks in parallel (also set with --jobs N). Default is 1.
 
     Notes:
-        - The function reads the source file in binary mode and applies a byte-level analysis to determine the proper conversion.
-        - A byte offset is added to the Unicode code points of the Korean characters to position them within the Chinese character range.
+        - The function reads the source file in large chunks, decodes them and remaps each chunk with str.translate.
+        - An offset is added to the Unicode code points of the Korean characters to position them within the Chinese character range.
+          The ranges and offsets are listed in hangulEsoRanges.
         - The resulting Chinese UTF-8 encoded text is written to the 'output.txt' file in UTF-8 encoding.
 
     Example:
@@ -391,52 +775,11 @@ def koreanToEso(txtFilename):
         ```
 
     """
-    not_eof = True
-    with open(txtFilename, 'rb') as textIns:
-        with open("output.txt", 'w', encoding="utf8") as out:
-            while not_eof:
-                shift = 1
-                char = textIns.read(shift)
-                value = int.from_bytes(char, "big")
-                next_char = None
-                if value > 0x00 and value <= 0x74:
-                    shift = 1
-                elif value >= 0xc0 and value <= 0xdf:
-                    shift = 2
-                elif value >= 0xe0 and value <= 0xef:
-                    shift = 3
-                elif value >= 0xf0 and value <= 0xf7:
-                    shift = 4
-                if shift > 1:
-                    next_char = textIns.read(shift - 1)
-                if next_char:
-                    char = b''.join([char, next_char])
-                if not char:
-                    # eof
-                    break
-                temp = int.from_bytes(char, "big")
-                if temp >= 0xE18480 and temp <= 0xE187BF:
-                    temp = temp + 0x43400
-                elif temp > 0xE384B0 and temp <= 0xE384BF:
-                    temp = temp + 0x237D0
-                elif temp > 0xE38580 and temp <= 0xE3868F:
-                    temp = temp + 0x23710
-                elif temp >= 0xEAB080 and temp <= 0xED9EAC:
-                    if temp >= 0xEAB880 and temp <= 0xEABFBF:
-                        temp = temp - 0x33800
-                    elif temp >= 0xEBB880 and temp <= 0xEBBFBF:
-                        temp = temp - 0x33800
-                    elif temp >= 0xECB880 and temp <= 0xECBFBF:
-                        temp = temp - 0x33800
-                    else:
-                        temp = temp - 0x3F800
-                char = temp.to_bytes(shift, byteorder='big')
-                outText = codecs.decode(char, 'UTF-8')
-                out.write(outText)
+    convertHangulFile(txtFilename, "output.txt", koreanToEsoTable, jobs)
 
 
 @mainFunction
-def esoToKorean(txtFilename):
+def esoToKorean(txtFilename, jobs=1):
     """
     Convert Chinese UTF-8 encoded text to traditional Korean UTF-8 encoded text with byte offset reversal.
 
@@ -447,10 +790,12 @@ def esoToKorean(txtFilename):
 
     Args:
         txtFilename (str): The filename of the source text file containing Chinese UTF-8 encoded text (e.g., 'kr.lang.txt').
+        jobs (int): Number of worker processes. With more than 1 the file is converted in line-aligned
+                    chunks in parallel (also set with --jobs N). Default is 1.
 
     Notes:
-        - The function reads the source file in binary mode and applies a byte-level analysis to determine the proper conversion.
-        - An opposite byte offset is subtracted from the Unicode code points of the Chinese characters to convert them back to
+        - The function reads the source file in large chunks, decodes them and remaps each chunk with str.translate.
+        - An opposite offset is subtracted from the Unicode code points of the Chinese characters to convert them back to
           their original traditional Korean characters.
         - The resulting traditional Korean UTF-8 encoded text is written to the 'output.txt' file in UTF-8 encoding.
 
@@ -466,48 +811,7 @@ def esoToKorean(txtFilename):
         ```
 
     """
-    not_eof = True
-    with open(txtFilename, 'rb') as textIns:
-        with open("output.txt", 'w', encoding="utf8") as out:
-            while not_eof:
-                shift = 1
-                char = textIns.read(shift)
-                value = int.from_bytes(char, "big")
-                next_char = None
-                if value > 0x00 and value <= 0x74:
-                    shift = 1
-                elif value >= 0xc0 and value <= 0xdf:
-                    shift = 2
-                elif value >= 0xe0 and value <= 0xef:
-                    shift = 3
-                elif value >= 0xf0 and value <= 0xf7:
-                    shift = 4
-                if shift > 1:
-                    next_char = textIns.read(shift - 1)
-                if next_char:
-                    char = b''.join([char, next_char])
-                if not char:
-                    # eof
-                    break
-                temp = int.from_bytes(char, "big")
-                if temp >= 0xE5B880 and temp <= 0xE5BBBF:
-                    temp = temp - 0x43400
-                elif temp > 0xE5BC80 and temp <= 0xE5BC8F:
-                    temp = temp - 0x237D0
-                elif temp > 0xE5BC90 and temp <= 0xE5BD9F:
-                    temp = temp - 0x23710
-                elif temp >= 0xE6B880 and temp <= 0xE9A6AC:
-                    if temp >= 0xE78080 and temp <= 0xE787BF:
-                        temp = temp + 0x33800
-                    elif temp >= 0xE88080 and temp <= 0xE887BF:
-                        temp = temp + 0x33800
-                    elif temp >= 0xE98080 and temp <= 0xE987BF:
-                        temp = temp + 0x33800
-                    else:
-                        temp = temp + 0x3F800
-                char = temp.to_bytes(shift, byteorder='big')
-                outText = codecs.decode(char, 'UTF-8')
-                out.write(outText)
+    convertHangulFile(txtFilename, "output.txt", esoToKoreanTable, jobs)
 
 
 @mainFunction
@@ -524,7 +828,7 @@ def addIndexToEosui(txtFilename):
         txtFilename (str): The filename of the target text file containing language entries (e.g., 'kr_client.str' or 'kr_pregame.str').
 
     Notes:
-        - The function uses regular expressions to detect and modify the entries.
+        - The function uses parseStrLine to detect and modify the entries.
         - Entries listed in the 'no_prefix_indexes' list will retain their original format without numeric tags.
 
     Example:
@@ -583,7 +887,6 @@ def addIndexToEosui(txtFilename):
         "SI_SLASH_STUCK",
     ]
 
-    textLines = []
     indexPrefix = ""
 
     if re.search('client', txtFilename):
@@ -591,34 +894,42 @@ def addIndexToEosui(txtFilename):
     if re.search('pregame', txtFilename):
         indexPrefix = "P:"
 
-    with open(txtFilename, 'r', encoding="utf8") as textIns:
-        for indexCount, line in enumerate(textIns, start=1):
-            maFontTag = reFontTag.match(line)
-            maClientUntaged = reClientUntaged.match(line)
-            maEmptyString = reEmptyString.match(line)
+    with open(txtFilename, 'r', encoding="utf8") as textIns, open("output.txt", 'w', encoding="utf8") as out:
+        out.writelines(iterEosuiLinesWithIndex(textIns, indexPrefix, set(no_prefix_indexes)))
 
-            if maFontTag:
-                textLines.append(line)
-                continue
-            elif maEmptyString:
-                conIndex = maEmptyString.group(1)
-                lineOut = '[{}] = ""\n'.format(conIndex)
-                textLines.append(lineOut)
-            elif maClientUntaged:
-                conIndex = maClientUntaged.group(1)
-                conText = maClientUntaged.group(2) or ''
-                conTextPreserved = preserve_escaped_sequences(conText)
-                if conIndex not in no_prefix_indexes:
-                    formattedLine = '[{}] = "{{{}}}{}"\n'.format(conIndex, indexPrefix + str(indexCount),
+
+def iterEosuiLinesWithIndex(lines, indexPrefix, noPrefixKeys):
+    """
+    Yield the output lines of addIndexToEosui for the lines of a .str file.
+
+    The tag is inserted by slicing the line after the opening quote of the value, which starts at
+    len(key) + 6. The escape placeholders used by the older format and restore path only change
+    text that already contains '-=', so only such lines still go through it.
+    """
+    for indexCount, line in enumerate(lines, start=1):
+        strLine = parseStrLine(line)
+
+        if strLine.isFont:
+            yield line
+        elif strLine.kind == STR_LINE_EMPTY:
+            yield '[{}] = ""\n'.format(strLine.key)
+        elif strLine.kind == STR_LINE_UNTAGGED:
+            if '-=' in line:
+                conTextPreserved = preserve_escaped_sequences(strLine.value)
+                if strLine.key not in noPrefixKeys:
+                    formattedLine = '[{}] = "{{{}}}{}"\n'.format(strLine.key, indexPrefix + str(indexCount),
                                                                  conTextPreserved)
                 else:
-                    formattedLine = '[{}] = "{}"\n'.format(conIndex, conTextPreserved)
-                lineOut = restore_escaped_sequences(formattedLine)
-                textLines.append(lineOut)
-
-    with open("output.txt", 'w', encoding="utf8") as out:
-        for line in textLines:
-            out.write(line)
+                    formattedLine = '[{}] = "{}"\n'.format(strLine.key, conTextPreserved)
+                yield restore_escaped_sequences(formattedLine)
+                continue
+            if not line.endswith('\n'):
+                line += '\n'
+            if strLine.key in noPrefixKeys:
+                yield line
+            else:
+                valueStart = len(strLine.key) + 6
+                yield '{}{{{}{}}}{}'.format(line[:valueStart], indexPrefix, indexCount, line[valueStart:])
 
 
 @mainFunction
@@ -634,7 +945,7 @@ def removeIndexFromEosui(txtFilename):
                           (e.g., 'kr_client.str' or 'kr_pregame.str').
 
     Notes:
-        - The function uses regular expressions to detect and remove tags, identifiers, and empty lines.
+        - The function uses parseStrLine to detect and remove tags, identifiers, and empty lines.
         - Entries containing '[Font:' are skipped, as well as empty lines.
         - The cleaned entries are written to the output file 'output.txt' in the same directory as the script.
 
@@ -650,32 +961,39 @@ def removeIndexFromEosui(txtFilename):
         ```
 
     """
-    textLines = []
+    with open(txtFilename, 'r', encoding="utf8") as textIns, open("output.txt", 'w', encoding="utf8") as out:
+        out.writelines(iterEosuiLinesWithoutIndex(textIns))
 
-    with open(txtFilename, 'r', encoding="utf8") as textIns:
-        for line in textIns:
-            line = line.rstrip()
-            maFontTag = reFontTag.search(line)
-            maEmptyString = reEmptyString.search(line)
 
-            if maFontTag or maEmptyString:
-                textLines.append(line + "\n")
-                continue
+def iterEosuiLinesWithoutIndex(lines):
+    """
+    Yield the output lines of removeIndexFromEosui for the lines of a .str file.
 
+    The tag is cut out by slicing the line around it, see iterEosuiLinesWithIndex. A tagged line
+    wins over an untagged one here: a quote in the value can let reClientUntaged take a longer key
+    that ends after the tag, as in [SI_X] = "{C:1}] = "}", and such lines are still matched with
+    reClientTaged.
+    """
+    for line in lines:
+        line = line.rstrip()
+        strLine = parseStrLine(line)
+        if strLine.kind == STR_LINE_UNTAGGED and ('{C:' in line or '{P:' in line):
             maClientTaged = reClientTaged.match(line)
             if maClientTaged:
-                conIndex = maClientTaged.group(1)
-                conText = maClientTaged.group(3)
-                escaped = preserve_escaped_sequences(conText)
-                formatted = '[{}] = "{}"\n'.format(conIndex, escaped)
-                lineOut = restore_escaped_sequences(formatted)
-                textLines.append(lineOut)
-            elif line:
-                textLines.append(line + "\n")
-
-    with open("output.txt", 'w', encoding="utf8") as out:
-        for lineOut in textLines:
-            out.write(lineOut)
+                strLine = StrLine(STR_LINE_TAGGED, maClientTaged.group(1), maClientTaged.group(2),
+                                  maClientTaged.group(3), strLine.isFont)
+
+        if strLine.isFont or strLine.kind == STR_LINE_EMPTY:
+            yield line + "\n"
+        elif strLine.kind == STR_LINE_TAGGED:
+            if '-=' in line:
+                formatted = '[{}] = "{}"\n'.format(strLine.key, preserve_escaped_sequences(strLine.value))
+                yield restore_escaped_sequences(formatted)
+            else:
+                valueStart = len(strLine.key) + 6
+                yield line[:valueStart] + line[valueStart + len(strLine.tag):] + "\n"
+        elif line:
+            yield line + "\n"
 
 
 @mainFunction
@@ -826,9 +1144,555 @@ def readNullString(offset, start, file):
     return textLine
 
 
-def readLangFile(languageFileName):
+# Number of strings a lazily loaded LangTable keeps in its cache
+lazyStringCacheSize = 65536
+
+
+# Parsed .lang files are cached in langCacheDir, or a .langcache directory next to the file
+useLangCache = True
+langCacheDir = None
+langCacheDirName = '.langcache'
+langCacheMaxSize = 1 << 30
+langCacheMagic = b'ESOLANGC'
+langCacheVersion = 1
+
+
+def readLangFile(languageFileName, useMmap=True, lazy=False, useCache=None):
     """Read a language file and extract index and string information.
 
+    Args:
+        languageFileName (str): The name of the language file to read.
+        useMmap (bool): If True, memory-map the file into a compact LangTable.
+                        If False, seek and read each string from the file into dicts. Default is True.
+        lazy (bool): If True, only the index table is parsed and strings are read from the
+                     memory map when accessed. Default is False.
+        useCache (bool, optional): Load and store the parsed LangTable in the language cache directory
+                                   (--cache-dir, or .langcache next to the file). Defaults to
+                                   useLangCache, which --no-cache turns off.
+
+    Returns:
+        dict, dict: Index and string information. With useMmap these are a LangTable and its
+        strings view, which support the same lookups as the dictionaries.
+    """
+    if lazy:
+        table = LazyLangTable(languageFileName)
+        return table, table.strings
+    if not useMmap:
+        return readLangFileSequential(languageFileName)
+    if useCache is None:
+        useCache = useLangCache
+    if not useCache:
+        return readLangFileMapped(languageFileName)
+
+    # The stamp of an unchanged file names its cache without hashing the file again
+    cacheDir = langCacheDirectory(languageFileName)
+    stat = os.stat(languageFileName)
+    stampPath = langCacheStampPath(cacheDir, languageFileName)
+    cachePath = readLangCacheStamp(stampPath, stat)
+    table = readLangCache(cachePath) if cachePath else None
+    if table is None:
+        cachePath = langCachePath(languageFileName, cacheDir)
+        table = readLangCache(cachePath)
+        if table is None:
+            table, tableStrings = readLangFileMapped(languageFileName)
+            writeLangCache(cachePath, table)
+        writeLangCacheStamp(stampPath, stat, cachePath)
+    return table, table.strings
+
+
+def langCacheDirectory(languageFileName):
+    """Return langCacheDir, or the .langcache directory next to the language file if it is not set."""
+    if langCacheDir:
+        return langCacheDir
+    return os.path.join(os.path.dirname(os.path.abspath(languageFileName)), langCacheDirName)
+
+
+def langCachePath(languageFileName, cacheDir):
+    """Return the cache file for a language file, named after its size and a hash of its contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    fileSize = os.path.getsize(languageFileName)
+    if fileSize:
+        with open(languageFileName, 'rb') as lineIn:
+            with mmap.mmap(lineIn.fileno(), 0, access=mmap.ACCESS_READ) as langMap:
+                digest.update(langMap)
+    return os.path.join(cacheDir, "{:x}-{}.langcache".format(fileSize, digest.hexdigest()))
+
+
+def langCacheStampPath(cacheDir, languageFileName):
+    """Return the stamp file recording the size, mtime and cache file of a language file path."""
+    pathHash = hashlib.blake2b(os.path.abspath(languageFileName).encode('utf8'), digest_size=8).hexdigest()
+    return os.path.join(cacheDir, "{}.stamp".format(pathHash))
+
+
+def readLangCacheStamp(stampPath, stat):
+    """Return the cache file of a stamp if its size and mtime match stat, otherwise None."""
+    try:
+        with open(stampPath, 'r', encoding="utf8") as stampIn:
+            fileSize, mtime, cacheName = stampIn.read().split(' ', 2)
+        if int(fileSize) != stat.st_size or int(mtime) != stat.st_mtime_ns:
+            return None
+    except (OSError, ValueError):
+        return None
+    return os.path.join(os.path.dirname(stampPath), cacheName)
+
+
+def writeLangCacheStamp(stampPath, stat, cachePath):
+    """Record the size, mtime and cache file of a language file. Failures only skip the stamp."""
+    tempPath = stampPath + '.tmp'
+    try:
+        with open(tempPath, 'w', encoding="utf8") as stampOut:
+            stampOut.write("{} {} {}".format(stat.st_size, stat.st_mtime_ns, os.path.basename(cachePath)))
+        os.replace(tempPath, stampPath)
+    except OSError:
+        pass
+
+
+def readLangCache(cachePath):
+    """Load a LangTable from a cache file, or return None if it is missing or unusable."""
+    try:
+        with open(cachePath, 'rb') as cacheIn:
+            with mmap.mmap(cacheIn.fileno(), 0, access=mmap.ACCESS_READ) as cacheMap:
+                header = struct.Struct('<8sI6sIIII')
+                magic, version, byteorder, numSections, numIndexes, stringCount, blobSize = \
+                    header.unpack_from(cacheMap, 0)
+                if (magic != langCacheMagic or version != langCacheVersion
+                        or byteorder.rstrip(b'\x00') != sys.byteorder.encode()):
+                    return None
+                table = LangTable(numSections)
+                position = header.size
+                for name, count in (('sectionIds', numIndexes), ('sectionIndexes', numIndexes),
+                                    ('stringIndexes', numIndexes), ('stringOffsets', numIndexes),
+                                    ('stringIds', numIndexes), ('stringStarts', stringCount + 1)):
+                    column = array('I')
+                    column.frombytes(cacheMap[position:position + 4 * count])
+                    setattr(table, name, column)
+                    position += 4 * count
+                table.stringBlob = bytearray(cacheMap[position:position + blobSize])
+                if len(table.stringBlob) != blobSize:
+                    return None
+        # Touch the file so eviction drops the least recently used caches first
+        os.utime(cachePath)
+    except (OSError, ValueError, struct.error):
+        return None
+    return table
+
+
+def writeLangCache(cachePath, table):
+    """Store a LangTable in a cache file and evict old caches. Failures only skip caching."""
+    cacheDir = os.path.dirname(cachePath)
+    tempPath = cachePath + '.tmp'
+    try:
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+        with open(tempPath, 'wb') as cacheOut:
+            cacheOut.write(struct.pack('<8sI6sIIII', langCacheMagic, langCacheVersion, sys.byteorder.encode(),
+                                       table.numSections, table.numIndexes, table.stringCount,
+                                       len(table.stringBlob)))
+            for column in (table.sectionIds, table.sectionIndexes, table.stringIndexes, table.stringOffsets,
+                           table.stringIds, table.stringStarts):
+                cacheOut.write(column.tobytes())
+            cacheOut.write(table.stringBlob)
+        os.replace(tempPath, cachePath)
+        evictLangCache(cacheDir, keep=cachePath)
+    except OSError as error:
+        print("Could not write language cache {}: {}".format(cachePath, error))
+
+
+def evictLangCache(cacheDir, maxSize=None, keep=None):
+    """Delete the least recently used cache files until the directory is under maxSize bytes."""
+    if maxSize is None:
+        maxSize = langCacheMaxSize
+    entries = []
+    for name in os.listdir(cacheDir):
+        if name.endswith('.langcache'):
+            path = os.path.join(cacheDir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    totalSize = sum(size for mtime, size, path in entries)
+    for mtime, size, path in sorted(entries):
+        if totalSize <= maxSize:
+            break
+        if path == keep:
+            continue
+        os.remove(path)
+        totalSize -= size
+
+
+class LangTableRow:
+    """Dict-like view of one index in a LangTable.
+
+    Supports the keys of the per-index dicts built by readLangFileSequential:
+    'sectionId', 'sectionIndex', 'stringIndex', 'stringOffset' and 'string'.
+    Assignments are written straight back to the table columns.
+    """
+    __slots__ = ('table', 'index')
+
+    fields = ('sectionId', 'sectionIndex', 'stringIndex', 'stringOffset', 'string')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key):
+        if key == 'string':
+            return self.table.getString(self.index)
+        return self.table.column(key)[self.index]
+
+    def __setitem__(self, key, value):
+        if key == 'string':
+            self.table.stringIds[self.index] = self.table.addString(value)
+        else:
+            self.table.column(key)[self.index] = value
+
+    def get(self, key, default=None):
+        if key in self.fields:
+            return self[key]
+        return default
+
+    def keys(self):
+        return self.fields
+
+    def asDict(self):
+        return {key: self[key] for key in self.fields}
+
+    def __eq__(self, other):
+        if isinstance(other, LangTableRow):
+            other = other.asDict()
+        return self.asDict() == other
+
+    def __repr__(self):
+        return "LangTableRow({})".format(self.asDict())
+
+
+class LangStrings:
+    """Dict-like view of the unique strings of a LangTable.
+
+    Mirrors the fileStrings dict built by readLangFileSequential:
+    fileStrings['stringCount'], fileStrings[n]['string'] and fileStrings[bytes]['stringOffset'].
+    """
+    __slots__ = ('table',)
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, key):
+        table = self.table
+        if key == 'stringCount':
+            return table.stringCount
+        if isinstance(key, int):
+            if not 0 <= key < table.stringCount:
+                raise KeyError(key)
+            return {'string': table.getUniqueString(key)}
+        stringId = table.findString(key)
+        if stringId is None:
+            raise KeyError(key)
+        return {'stringOffset': table.stringStarts[stringId]}
+
+    def __contains__(self, key):
+        if key == 'stringCount':
+            return True
+        if isinstance(key, int):
+            return 0 <= key < self.table.stringCount
+        return self.table.findString(key) is not None
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+
+class LangTable:
+    """Columnar storage for the contents of a .lang file.
+
+    The four index columns are kept in array('I') columns and every unique string is stored
+    once in a contiguous blob, null terminated, in order of first use. stringStarts holds the
+    start of each unique string in the blob followed by the blob length, so the start of a
+    string is also the offset writeLangFile gives it. stringIds maps every index to its
+    unique string.
+
+    Indexing with 'numIndexes', 'numSections' or an index number behaves like the fileIndexes
+    dict built by readLangFileSequential, and the strings attribute behaves like its
+    fileStrings dict, so existing callers keep working unchanged.
+    """
+
+    def __init__(self, numSections=0):
+        self.numSections = numSections
+        self.sectionIds = array('I')
+        self.sectionIndexes = array('I')
+        self.stringIndexes = array('I')
+        self.stringOffsets = array('I')
+        self.stringIds = array('I')
+        self.stringBlob = bytearray()
+        self.stringStarts = array('I', [0])
+        self.strings = LangStrings(self)
+        self._stringLookup = None
+        self._sectionRanges = None
+
+    @property
+    def numIndexes(self):
+        return len(self.sectionIds)
+
+    @property
+    def stringCount(self):
+        return len(self.stringStarts) - 1
+
+    def column(self, key):
+        if key == 'sectionId':
+            return self.sectionIds
+        if key == 'sectionIndex':
+            return self.sectionIndexes
+        if key == 'stringIndex':
+            return self.stringIndexes
+        if key == 'stringOffset':
+            return self.stringOffsets
+        raise KeyError(key)
+
+    def getUniqueString(self, stringId):
+        return bytes(self.stringBlob[self.stringStarts[stringId]:self.stringStarts[stringId + 1] - 1])
+
+    def getString(self, index):
+        return self.getUniqueString(self.stringIds[index])
+
+    def findString(self, text):
+        """Return the unique string number for text, or None if it is not in the table."""
+        if self._stringLookup is None:
+            self._stringLookup = {self.getUniqueString(stringId): stringId for stringId in range(self.stringCount)}
+        return self._stringLookup.get(bytes(text))
+
+    def addString(self, text):
+        """Add text to the string blob unless it is already there and return its unique string number."""
+        text = bytes(text)
+        stringId = self.findString(text)
+        if stringId is None:
+            stringId = self.stringCount
+            self.stringBlob += text
+            self.stringBlob += b"\x00"
+            self.stringStarts.append(len(self.stringBlob))
+            self._stringLookup[text] = stringId
+        return stringId
+
+    def append(self, sectionId, sectionIndex, stringIndex, text, stringOffset=0):
+        self._sectionRanges = None
+        self.sectionIds.append(sectionId)
+        self.sectionIndexes.append(sectionIndex)
+        self.stringIndexes.append(stringIndex)
+        self.stringOffsets.append(stringOffset)
+        self.stringIds.append(self.addString(text))
+
+    @property
+    def sectionRanges(self):
+        """Map each sectionId to the list of [start, end) row ranges holding its indexes.
+
+        Sections are normally one contiguous range. The ranges are recorded when a file is
+        read and rebuilt from the sectionIds column if the table has changed since.
+        """
+        if self._sectionRanges is None:
+            self._sectionRanges = findSectionRanges(self.sectionIds)
+        return self._sectionRanges
+
+    def sectionRows(self, sectionId):
+        """Return the row numbers of every index in a section."""
+        return [row for start, end in self.sectionRanges.get(sectionId, ()) for row in range(start, end)]
+
+    def findRow(self, sectionId, sectionIndex, stringIndex):
+        """Return the row number of an index, or None if it is not in the table."""
+        sectionIndexes = self.sectionIndexes
+        stringIndexes = self.stringIndexes
+        for row in self.sectionRows(sectionId):
+            if sectionIndexes[row] == sectionIndex and stringIndexes[row] == stringIndex:
+                return row
+        return None
+
+    def lookup(self, sectionId, sectionIndex, stringIndex):
+        """Return the string of an index, or None if it is not in the table."""
+        row = self.findRow(sectionId, sectionIndex, stringIndex)
+        if row is None:
+            return None
+        return self.getString(row)
+
+    def __getitem__(self, key):
+        if key == 'numIndexes':
+            return self.numIndexes
+        if key == 'numSections':
+            return self.numSections
+        if isinstance(key, int) and 0 <= key < self.numIndexes:
+            return LangTableRow(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in ('numIndexes', 'numSections'):
+            return True
+        return isinstance(key, int) and 0 <= key < self.numIndexes
+
+    def __len__(self):
+        return self.numIndexes
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+
+def readLangIndexTable(langMap, table):
+    """Decode the header and index table of a mapped language file into the columns of table.
+
+    Returns:
+        int: The position of the strings area in the file.
+    """
+    numSections, numIndexes = struct.unpack_from('>II', langMap, 0)
+    stringsStartPosition = 8 + (16 * numIndexes)
+    table.numSections = numSections
+
+    indexTable = array('I')
+    indexTable.frombytes(langMap[8:stringsStartPosition])
+    if sys.byteorder == 'little':
+        indexTable.byteswap()
+    table.sectionIds = indexTable[0::4]
+    table.sectionIndexes = indexTable[1::4]
+    table.stringIndexes = indexTable[2::4]
+    table.stringOffsets = indexTable[3::4]
+    table._sectionRanges = findSectionRanges(table.sectionIds)
+    return stringsStartPosition
+
+
+def findSectionRanges(sectionIds):
+    """Return a dict of sectionId to the [start, end) row ranges of its indexes."""
+    sectionRanges = {}
+    start = 0
+    for sectionId, group in itertools.groupby(sectionIds):
+        end = start + sum(1 for _ in group)
+        sectionRanges.setdefault(sectionId, []).append((start, end))
+        start = end
+    return sectionRanges
+
+
+def readMappedString(langMap, start):
+    """Return the bytes from start up to the next null terminator, or the end of the file."""
+    end = langMap.find(b"\x00", start)
+    if end < 0:
+        end = len(langMap)
+    return langMap[start:end]
+
+
+def collectLangStrings(langMap, stringsStartPosition, stringOffsets):
+    """Read every unique string referenced by stringOffsets into a blob.
+
+    Returns:
+        array, bytearray, array: stringIds for every index, the string blob and the string starts,
+        as stored in a LangTable.
+    """
+    stringIds = array('I')
+    stringBlob = bytearray()
+    stringStarts = array('I', [0])
+    idsByOffset = {}
+    idsByString = {}
+    for stringOffset in stringOffsets:
+        stringId = idsByOffset.get(stringOffset)
+        if stringId is None:
+            indexString = readMappedString(langMap, stringsStartPosition + stringOffset)
+            stringId = idsByString.get(indexString)
+            if stringId is None:
+                stringId = len(idsByString)
+                idsByString[indexString] = stringId
+                stringBlob += indexString
+                stringBlob += b"\x00"
+                stringStarts.append(len(stringBlob))
+            idsByOffset[stringOffset] = stringId
+        stringIds.append(stringId)
+    return stringIds, stringBlob, stringStarts
+
+
+def readLangFileMapped(languageFileName):
+    """Read a language file through a memory map into a LangTable.
+
+    The whole 16-byte index table is decoded with one array.frombytes call and each
+    unique string is sliced from the mapped strings area up to its null terminator, so
+    no seek or read calls are made per index.
+
+    Args:
+        languageFileName (str): The name of the language file to read.
+
+    Returns:
+        LangTable, LangStrings: The table, usable as fileIndexes, and its strings view,
+        usable as fileStrings.
+    """
+    table = LangTable()
+    with open(languageFileName, 'rb') as lineIn:
+        with mmap.mmap(lineIn.fileno(), 0, access=mmap.ACCESS_READ) as langMap:
+            stringsStartPosition = readLangIndexTable(langMap, table)
+            table.stringIds, table.stringBlob, table.stringStarts = collectLangStrings(
+                langMap, stringsStartPosition, table.stringOffsets)
+
+    return table, table.strings
+
+
+class LazyLangTable(LangTable):
+    """A LangTable that only parses the index table up front.
+
+    Strings are read from the memory-mapped file when an index is accessed and the most
+    recently used ones are kept in an LRU cache. The string blob used by writeLangFile and
+    the strings view is only built the first time it is needed. Call close() to release the
+    memory map.
+    """
+
+    def __init__(self, languageFileName):
+        super().__init__()
+        self._stringsLoaded = False
+        with open(languageFileName, 'rb') as lineIn:
+            self._map = mmap.mmap(lineIn.fileno(), 0, access=mmap.ACCESS_READ)
+        self._stringsStartPosition = readLangIndexTable(self._map, self)
+        self._readString = functools.lru_cache(maxsize=lazyStringCacheSize)(self._readStringAt)
+
+    def _readStringAt(self, stringOffset):
+        return readMappedString(self._map, self._stringsStartPosition + stringOffset)
+
+    def _loadStrings(self):
+        if not self._stringsLoaded:
+            self._stringIds, self._stringBlob, self._stringStarts = collectLangStrings(
+                self._map, self._stringsStartPosition, self.stringOffsets)
+            self._stringsLoaded = True
+
+    @property
+    def stringIds(self):
+        self._loadStrings()
+        return self._stringIds
+
+    @stringIds.setter
+    def stringIds(self, value):
+        self._stringIds = value
+
+    @property
+    def stringBlob(self):
+        self._loadStrings()
+        return self._stringBlob
+
+    @stringBlob.setter
+    def stringBlob(self, value):
+        self._stringBlob = value
+
+    @property
+    def stringStarts(self):
+        self._loadStrings()
+        return self._stringStarts
+
+    @stringStarts.setter
+    def stringStarts(self, value):
+        self._stringStarts = value
+
+    def getString(self, index):
+        if self._stringsLoaded:
+            return super().getString(index)
+        return self._readString(self.stringOffsets[index])
+
+    def close(self):
+        """Release the memory map. Strings that were not loaded can no longer be read."""
+        self._readString.cache_clear()
+        self._map.close()
+
+
+def readLangFileSequential(languageFileName):
+    """Read a language file by seeking to each string in turn.
+
     Args:
         languageFileName (str): The name of the language file to read.
 
@@ -873,41 +1737,119 @@ def readLangFile(languageFileName):
     return fileIndexes, fileStrings
 
 
+class LangFileBuilder:
+    """Build a .lang file one index at a time.
+
+    Strings are deduplicated through a hash index as they are added and each new string
+    is given the next offset in the string blob, so the index table and the string blob
+    are complete as soon as the last index is added. write() emits the header, the packed
+    index table and the string blob with three writes.
+
+    Example:
+        builder = LangFileBuilder(numSections)
+        builder.add(8290981, 0, 123, "Julien Rissiel^M")
+        builder.write('kr.lang')
+    """
+
+    def __init__(self, numSections=0):
+        self.numSections = numSections
+        self.indexTable = array('I')
+        self.stringBlob = bytearray()
+        self._stringOffsets = {}
+
+    @classmethod
+    def fromLangTable(cls, table):
+        """Create a builder holding every index and string of a LangTable."""
+        builder = cls(table.numSections)
+        numIndexes = table.numIndexes
+        stringStarts = table.stringStarts
+        builder.indexTable = array('I', bytes(16 * numIndexes))
+        builder.indexTable[0::4] = table.sectionIds
+        builder.indexTable[1::4] = table.sectionIndexes
+        builder.indexTable[2::4] = table.stringIndexes
+        builder.indexTable[3::4] = array('I', [stringStarts[stringId] for stringId in table.stringIds])
+        builder.stringBlob = bytearray(table.stringBlob)
+        builder._stringOffsets = None
+        return builder
+
+    @property
+    def numIndexes(self):
+        return len(self.indexTable) // 4
+
+    @property
+    def stringCount(self):
+        return len(self._lookup())
+
+    def _lookup(self):
+        if self._stringOffsets is None:
+            self._stringOffsets = {}
+            stringOffset = 0
+            for text in self.stringBlob[:-1].split(b"\x00") if self.stringBlob else ():
+                self._stringOffsets.setdefault(bytes(text), stringOffset)
+                stringOffset += len(text) + 1
+        return self._stringOffsets
+
+    def addString(self, text):
+        """Add text to the string blob unless it is already there and return its offset."""
+        if isinstance(text, str):
+            text = text.encode('utf8')
+        else:
+            text = bytes(text)
+        stringOffsets = self._lookup()
+        stringOffset = stringOffsets.get(text)
+        if stringOffset is None:
+            stringOffset = len(self.stringBlob)
+            stringOffsets[text] = stringOffset
+            self.stringBlob += text
+            self.stringBlob += b"\x00"
+        return stringOffset
+
+    def add(self, sectionId, sectionIndex, stringIndex, text):
+        """Append an index entry for text (str or bytes) and return the string offset it was given."""
+        stringOffset = self.addString(text)
+        self.indexTable.extend((sectionId, sectionIndex, stringIndex, stringOffset))
+        return stringOffset
+
+    def write(self, languageFileName):
+        indexTable = self.indexTable
+        if sys.byteorder == 'little':
+            indexTable = array('I', indexTable)
+            indexTable.byteswap()
+        with open(languageFileName, 'wb') as indexOut:
+            indexOut.write(struct.pack('>II', self.numSections, self.numIndexes))
+            indexOut.write(indexTable.tobytes())
+            indexOut.write(self.stringBlob)
+
+
 def writeLangFile(languageFileName, fileIndexes, fileStrings):
     """Write index and string information back to a language file.
 
+    Strings are written in the order of fileStrings and every index gets the offset
+    of its string, which is also stored back into fileIndexes.
+
     Args:
         languageFileName (str): The name of the language file to write to.
-        fileIndexes (dict): Dictionary containing index information.
-        fileStrings (dict): Dictionary containing string information.
+        fileIndexes (dict): Dictionary containing index information, or a LangTable.
+        fileStrings (dict): Dictionary containing string information, or a LangStrings view.
     """
+    if isinstance(fileIndexes, LangTable):
+        builder = LangFileBuilder.fromLangTable(fileIndexes)
+        fileIndexes.stringOffsets = builder.indexTable[3::4]
+        builder.write(languageFileName)
+        return
+
     numIndexes = fileIndexes['numIndexes']
     numSections = fileIndexes['numSections']
     numStrings = fileStrings['stringCount']
 
-    # Read the indexes and update offset if string length has changed.
+    builder = LangFileBuilder(numSections)
+    for index in range(numStrings):
+        builder.addString(fileStrings[index]['string'])
     for index in range(numIndexes):
         currentIndex = fileIndexes[index]
-        dictString = currentIndex['string']
-        currentStringInfo = fileStrings[dictString]
-        currentOffset = currentStringInfo['stringOffset']
-        fileIndexes[index]['stringOffset'] = currentOffset
-
-    with open(languageFileName, 'wb') as indexOut:
-        writeUInt32(indexOut, numSections)
-        writeUInt32(indexOut, numIndexes)
-        for index in range(numIndexes):
-            currentIndex = fileIndexes[index]
-            sectionId = currentIndex['sectionId']
-            sectionIndex = currentIndex['sectionIndex']
-            stringIndex = currentIndex['stringIndex']
-            stringOffset = currentIndex['stringOffset']
-            chunk = struct.pack('>IIII', sectionId, sectionIndex, stringIndex, stringOffset)
-            indexOut.write(chunk)
-        for index in range(numStrings):
-            currentDict = fileStrings[index]
-            currentString = currentDict['string']
-            indexOut.write(currentString + b'\x00')
+        currentIndex['stringOffset'] = builder.add(currentIndex['sectionId'], currentIndex['sectionIndex'],
+                                                   currentIndex['stringIndex'], currentIndex['string'])
+    builder.write(languageFileName)
 
 
 @mainFunction
@@ -993,7 +1935,7 @@ def extractSectionEntries(langFile, section_arg, useName=True):
         else:
             output_name = "{}.txt".format(section_id)
     except ValueError:
-        section_id = get_section_id(section_arg)
+        section_id = sectionRegistry.idByName(section_arg)
         if section_id is None:
             print("Error: Unknown section name '{}'".format(section_arg))
             return
@@ -1003,50 +1945,331 @@ def extractSectionEntries(langFile, section_arg, useName=True):
         else:
             output_name = "{}.txt".format(section_id)
 
-    fileIndexes, fileStrings = readLangFile(langFile)
+    fileIndexes, fileStrings = readLangFile(langFile, lazy=True)
 
-    with open(output_name, "w", encoding="utf8") as out:
-        for i in range(fileIndexes['numIndexes']):
-            entry = fileIndexes[i]
-            if entry['sectionId'] == section_id:
+    try:
+        with open(output_name, "w", encoding="utf8") as out:
+            for i in fileIndexes.sectionRows(section_id):
+                entry = fileIndexes[i]
                 secId = entry['sectionId']
                 secIdx = entry['sectionIndex']
                 strIdx = entry['stringIndex']
-                raw_bytes = entry['string']
-                escaped_bytes = preserve_escaped_sequences_bytes(raw_bytes)
-                utf8_string = bytes(escaped_bytes).decode("utf8", errors="replace")
-                formatted = "{{{{{}-{}-{}:}}}}{}\n".format(secId, secIdx, strIdx, utf8_string)
-                lineOut = restore_escaped_sequences(formatted)
-                out.write(lineOut)
+                out.write(formatTaggedLine(secId, secIdx, strIdx, entry['string']))
+    finally:
+        fileIndexes.close()
 
     print("Done. Extracted entries from section {} to {}".format(section_id, output_name))
 
 
-def processEosuiTextFile(filename, text_dict):
-    """Read and process an ESOUI text file (en_client.str or en_pregame.str)
-    and populate the provided text_dict.
+@mainFunction
+def exportLangToTagged(langFile, outDir=".", sections=None, combinedFile=None, sortByIndex=False):
+    """
+    Export a language file to tagged text for every section, or a list of sections, in one pass.
+
+    The language file is parsed once and each entry is written as
+    {{sectionId-sectionIndex-stringIndex:}}text, escaped the same way as extractSectionEntries.
+
+    Args:
+        langFile (str): The .lang file to read (e.g., en.lang).
+        outDir (str): Directory for the output files. Default is the current directory.
+        sections (str|list, optional): Section names or IDs to export, as a list or a comma separated
+                                       string (e.g., "npc_names,8290981"). If None, all sections are exported.
+        combinedFile (str, optional): If given, all entries are written to this one file inside outDir
+                                      instead of one file per section.
+        sortByIndex (bool): If True, entries are written in ascending (sectionId, sectionIndex, stringIndex)
+                            order, as diffSortedLangText needs, instead of the order of the index table.
+                            Default is False.
+
+    Writes:
+        <sectionId>_<sectionName>.txt for named sections and <sectionId>.txt for the others,
+        or the single combinedFile.
+    """
+    section_ids = None
+    if sections is not None:
+        if isinstance(sections, str):
+            sections = [part.strip() for part in sections.split(',') if part.strip()]
+        section_ids = set()
+        for section_arg in sections:
+            try:
+                section_id = int(section_arg)
+            except ValueError:
+                section_id = sectionRegistry.idByName(section_arg)
+                if section_id is None:
+                    print("Error: Unknown section name '{}'".format(section_arg))
+                    return
+            section_ids.add(section_id)
+
+    if not os.path.isdir(outDir):
+        os.makedirs(outDir)
+
+    # A subset of sections only needs the strings of its own rows
+    table, tableStrings = readLangFile(langFile, lazy=section_ids is not None)
+
+    decodedStrings = {}
+    openedFiles = set()
+    currentSection = None
+    out = None
+    if combinedFile:
+        out = open(os.path.join(outDir, combinedFile), "w", encoding="utf8")
+    entryCount = 0
+    if section_ids is None:
+        rowRanges = [(0, table.numIndexes)]
+    else:
+        rowRanges = sorted(rowRange for section_id in section_ids
+                           for rowRange in table.sectionRanges.get(section_id, ()))
+    rows = itertools.chain.from_iterable(itertools.starmap(range, rowRanges))
+    if sortByIndex:
+        rows = sorted(rows, key=lambda row: (table.sectionIds[row], table.sectionIndexes[row],
+                                             table.stringIndexes[row]))
+    try:
+        for row in rows:
+            secId = table.sectionIds[row]
+            secIdx = table.sectionIndexes[row]
+            strIdx = table.stringIndexes[row]
+            stringOffset = table.stringOffsets[row]
+            if not combinedFile and secId != currentSection:
+                if out is not None:
+                    out.close()
+                output_name = os.path.join(outDir, sectionOutputName(secId))
+                # Sections are normally contiguous, reopen in append mode if one is split
+                out = open(output_name, "a" if secId in openedFiles else "w", encoding="utf8")
+                openedFiles.add(secId)
+                currentSection = secId
+            text = decodedStrings.get(stringOffset)
+            if text is None:
+                text = decodeLangString(table.getString(row))
+                decodedStrings[stringOffset] = text
+            out.write(restore_escaped_sequences("{{{{{}-{}-{}:}}}}{}\n".format(secId, secIdx, strIdx, text)))
+            entryCount += 1
+    finally:
+        if out is not None:
+            out.close()
+        if section_ids is not None:
+            table.close()
+
+    if combinedFile:
+        print("Done. Exported {} entries to {}".format(entryCount, os.path.join(outDir, combinedFile)))
+    else:
+        print("Done. Exported {} entries from {} sections to {}".format(entryCount, len(openedFiles), outDir))
+
+
+def packLangKey(sectionId, sectionIndex, stringIndex):
+    """Pack the three numbers of an index into one int for use as a dictionary key."""
+    return (sectionId << 64) | (sectionIndex << 32) | stringIndex
+
+
+def parseLangKey(key):
+    """Return the packed key for a 'sectionId-sectionIndex-stringIndex' string, or None if it is malformed."""
+    parts = key.split('-')
+    if len(parts) != 3:
+        return None
+    try:
+        return packLangKey(int(parts[0]), int(parts[1]), int(parts[2]))
+    except ValueError:
+        return None
+
+
+def compileTaggedEntriesToLang(entries, templateLang, outLang):
+    """Write a .lang file from the template with the text of the given entries.
+
+    Args:
+        entries (iterable): (key, text) pairs, where key is 'sectionId-sectionIndex-stringIndex'.
+        templateLang (str): The .lang file supplying the index table and untranslated strings.
+        outLang (str): The .lang file to write.
+
+    Returns:
+        int, int: The number of entries applied and the number whose key is not in the template.
+    """
+    table, tableStrings = readLangFile(templateLang)
+    rowsByKey = {
+        packLangKey(secId, secIdx, strIdx): row
+        for row, (secId, secIdx, strIdx) in enumerate(zip(table.sectionIds, table.sectionIndexes,
+                                                          table.stringIndexes))
+    }
+
+    replacedStrings = {}
+    appliedCount = 0
+    unknownCount = 0
+    for key, text in entries:
+        row = rowsByKey.get(parseLangKey(key))
+        if row is None:
+            unknownCount += 1
+            continue
+        replacedStrings[row] = encodeLangString(text)
+        appliedCount += 1
+    del rowsByKey
+
+    builder = LangFileBuilder(table.numSections)
+    for row, (secId, secIdx, strIdx, stringId) in enumerate(zip(table.sectionIds, table.sectionIndexes,
+                                                                table.stringIndexes, table.stringIds)):
+        text = replacedStrings.get(row)
+        if text is None:
+            text = table.getUniqueString(stringId)
+        builder.add(secId, secIdx, strIdx, text)
+    builder.write(outLang)
+
+    return appliedCount, unknownCount
+
+
+@mainFunction
+def compileTaggedToLang(taggedFile, templateLang, outLang="output.lang"):
+    """
+    Compile a tagged text file back into a binary language file.
+
+    Every {{sectionId-sectionIndex-stringIndex:}}text line of taggedFile replaces the string of the same
+    index in templateLang. Indexes without a tagged line keep the template text. The result is written
+    with the same layout writeLangFile produces.
+
+    Args:
+        taggedFile (str): The translated tagged file (e.g., output of diffIndexedLangText or
+                          mergeExtractedSectionIntoLang).
+        templateLang (str): The language file providing the index table (e.g., en.lang).
+        outLang (str, optional): The language file to write. Defaults to "output.lang".
+
+    Example:
+        Calling `compileTaggedToLang('kr.lang_tag.txt', 'en.lang', 'kr.lang')` writes 'kr.lang'.
+    """
+    appliedCount, unknownCount = compileTaggedEntriesToLang(iterTaggedLangFile(taggedFile), templateLang, outLang)
+    if unknownCount:
+        print("{}: entries not found in {} were skipped".format(unknownCount, templateLang))
+    print("Done. Compiled {} entries from {} into {}".format(appliedCount, taggedFile, outLang))
+
+
+# Parsed .str files kept by StrFile.load, least recently used ones are dropped first
+strFileCacheSize = 8
+
+
+class StrFile:
+    """
+    Parsed contents of an ESOUI .str file (en_client.str, kr_pregame.str, ...).
+
+    Every line of the file is a row in the parallel lists kinds, keys, tags, values and fonts,
+    filled from parseStrLine on the line without trailing whitespace. rowsByKey maps a key to
+    the last row that defines it. Rows that lines() cannot rebuild as [key] = "tagvalue", such
+    as font lines, blank lines or lines with trailing whitespace, keep their text in rawLines,
+    so an unchanged StrFile is written back exactly as it was read.
+
+    StrFile.load caches up to strFileCacheSize parsed files by path, size and modification time
+    so a multi-step job parses each file once. Loaded instances are shared and should be treated
+    as read-only.
+    """
+    _cache = OrderedDict()
+
+    def __init__(self):
+        self.kinds = []
+        self.keys = []
+        self.tags = []
+        self.values = []
+        self.fonts = []
+        self.padded = []
+        self.rawLines = []
+        self.rowsByKey = {}
+        self.finalNewline = True
+
+    @classmethod
+    def load(cls, filename, encoding="utf8"):
+        """Return the parsed file, reusing an earlier parse if the file has not changed."""
+        stat = os.stat(filename)
+        cacheKey = (os.path.abspath(filename), encoding)
+        cached = cls._cache.get(cacheKey)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            cls._cache.move_to_end(cacheKey)
+            return cached[1]
+        with open(filename, 'r', encoding=encoding) as textIns:
+            strFile = cls.parse(textIns)
+        cls._cache[cacheKey] = ((stat.st_size, stat.st_mtime_ns), strFile)
+        cls._cache.move_to_end(cacheKey)
+        while len(cls._cache) > strFileCacheSize:
+            cls._cache.popitem(last=False)
+        return strFile
+
+    @classmethod
+    def parse(cls, lines):
+        strFile = cls()
+        line = '\n'
+        for line in lines:
+            strFile.appendLine(line)
+        strFile.finalNewline = line.endswith('\n')
+        return strFile
+
+    def appendLine(self, line):
+        text = line[:-1] if line.endswith('\n') else line
+        stripped = text.rstrip()
+        strLine = parseStrLine(stripped)
+        row = len(self.kinds)
+        self.kinds.append(strLine.kind)
+        self.keys.append(strLine.key)
+        self.tags.append(strLine.tag)
+        self.values.append(strLine.value)
+        self.fonts.append(strLine.isFont)
+        self.padded.append(stripped != text)
+        if strLine.kind is None or strLine.isFont or stripped != text:
+            self.rawLines.append(text)
+        else:
+            self.rawLines.append(None)
+        if strLine.key is not None:
+            self.rowsByKey[strLine.key] = row
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __contains__(self, key):
+        return key in self.rowsByKey
+
+    def get(self, key, default=None):
+        row = self.rowsByKey.get(key)
+        if row is None:
+            return default
+        return self.values[row]
+
+    def entries(self, includeFonts=True, includePadded=True):
+        """Yield (key, value) for every empty or untagged entry, the lines matched by reClientUntaged.
+
+        includePadded=False skips entries followed by trailing whitespace, which reClientUntaged
+        only matches after the line has been stripped.
+        """
+        kinds = self.kinds
+        fonts = self.fonts
+        padded = self.padded
+        for row in range(len(kinds)):
+            if kinds[row] != STR_LINE_EMPTY and kinds[row] != STR_LINE_UNTAGGED:
+                continue
+            if (includeFonts or not fonts[row]) and (includePadded or not padded[row]):
+                yield self.keys[row], self.values[row]
+
+    def toDict(self, includeFonts=True, includePadded=True):
+        return dict(self.entries(includeFonts, includePadded))
+
+    def lines(self):
+        """Yield every row as a line of the .str format, without the newline."""
+        for row in range(len(self.kinds)):
+            rawLine = self.rawLines[row]
+            if rawLine is not None:
+                yield rawLine
+            else:
+                yield '[{}] = "{}{}"'.format(self.keys[row], self.tags[row] or '', self.values[row])
+
+    def write(self, filename, encoding="utf8"):
+        with open(filename, 'w', encoding=encoding) as out:
+            out.write('\n'.join(self.lines()))
+            if self.finalNewline and len(self.kinds):
+                out.write('\n')
+
+
+def processEosuiTextFile(filename, text_dict, encoding="utf8"):
+    """Read and process an ESOUI text file (en_client.str or en_pregame.str)
+    and populate the provided text_dict.
 
     Args:
         filename (str): The filename of the ESOUI text file (en_client.str or en_pregame.str) to process.
         text_dict (dict): A dictionary to store the extracted text entries.
+        encoding (str): The file encoding. Use 'esokr' to read kr_client.str or kr_pregame.str as Korean.
 
     Returns:
         None
     """
-    with open(filename, 'r', encoding="utf8") as textIns:
-        for line in textIns:
-            line = line.rstrip()
-            maEmptyString = reEmptyString.match(line)
-            maClientUntaged = reClientUntaged.match(line)
-
-            if maEmptyString:
-                conIndex = maEmptyString.group(1)
-                conText = ""
-                text_dict[conIndex] = conText
-            elif maClientUntaged:
-                conIndex = maClientUntaged.group(1)  # Key (conIndex)
-                conText = maClientUntaged.group(2) if maClientUntaged.group(2) is not None else ''
-                text_dict[conIndex] = conText
+    for conIndex, conText in StrFile.load(filename, encoding).entries():
+        text_dict[conIndex] = conText
 
 
 @mainFunction
@@ -1122,23 +2345,13 @@ def createPoFileFromEsoUI(inputFile, lang="en", outputFile="messages.po", isBase
     # Load English strings for msgid reference
     english_map = {}
     if inputEnglishFile:
-        with open(inputEnglishFile, 'r', encoding='utf-8') as f_en:
-            for line in f_en:
-                m = reClientUntaged.match(line)
-                if m:
-                    k, v = m.group(1), m.group(2)
-                    english_map[k] = bytes(v, 'utf-8').decode('unicode_escape')
+        for k, v in StrFile.load(inputEnglishFile).entries(includePadded=False):
+            english_map[k] = bytes(v, 'utf-8').decode('unicode_escape')
 
     # Load current language strings (either English or translated)
     translated_map = {}
-    with open(inputFile, 'r', encoding='utf-8') as f_trans:
-        for line in f_trans:
-            if reFontTag.match(line):
-                continue
-            m = reClientUntaged.match(line)
-            if m:
-                k, v = m.group(1), m.group(2)
-                translated_map[k] = bytes(v, 'utf-8').decode('unicode_escape')
+    for k, v in StrFile.load(inputFile).entries(includeFonts=False, includePadded=False):
+        translated_map[k] = bytes(v, 'utf-8').decode('unicode_escape')
 
     # Create PO file
     po = polib.POFile()
@@ -1178,7 +2391,7 @@ def createWeblateFile(inputFile, lang="en", outputFile=None, component=None):
         component (str, optional): Optional top-level key (e.g., "client"). If None, the output will be flat.
 
     Notes:
-        This function extracts constant entries using the reClientUntaged pattern from the input file,
+        This function extracts constant entries using parseStrLine from the input file,
         builds a dictionary of translations, and writes them in YAML format suitable for Weblate.
 
     Example:
@@ -1204,16 +2417,9 @@ def createWeblateFile(inputFile, lang="en", outputFile=None, component=None):
         with open(inputFile, 'r', encoding="utf8") as textIns:
             translations = {}
             for line in textIns:
-                maEmptyString = reEmptyString.match(line)
-                maClientUntaged = reClientUntaged.match(line)
-                if maEmptyString:
-                    conIndex = maEmptyString.group(1)
-                    conText = ''
-                    translations[conIndex] = DoubleQuotedScalarString(conText)
-                elif maClientUntaged:
-                    conIndex = maClientUntaged.group(1)
-                    conText = maClientUntaged.group(2) if maClientUntaged.group(2) is not None else ''
-                    translations[conIndex] = DoubleQuotedScalarString(conText)
+                strLine = parseStrLine(line)
+                if strLine.kind == STR_LINE_EMPTY or strLine.kind == STR_LINE_UNTAGGED:
+                    translations[strLine.key] = DoubleQuotedScalarString(strLine.value)
     except FileNotFoundError:
         print("{} not found. Aborting.".format(inputFile))
         return
@@ -1284,28 +2490,18 @@ def importClientTranslations(inputYaml, inputEnglishFile, inputLocalizedFile, la
             }
 
     # Read English .str file and populate or update base entries
-    with open(inputEnglishFile, 'r', encoding="utf8") as en_file:
-        for line in en_file:
-            ma = reClientUntaged.match(line)
-            if ma:
-                key = ma.group(1)
-                value = ma.group(2)
-                if key not in translations:
-                    translations[key] = {}
-                translations[key]['english'] = value
-                if langValue not in translations[key]:
-                    translations[key][langValue] = ""
+    for key, value in StrFile.load(inputEnglishFile).entries(includePadded=False):
+        if key not in translations:
+            translations[key] = {}
+        translations[key]['english'] = value
+        if langValue not in translations[key]:
+            translations[key][langValue] = ""
 
     # Read localized .str file and populate only existing keys
-    with open(inputLocalizedFile, 'r', encoding="utf8") as loc_file:
-        for line in loc_file:
-            ma = reClientUntaged.match(line)
-            if ma:
-                key = ma.group(1)
-                value = ma.group(2)
-                if key in translations:
-                    if value != translations[key].get('english', ''):
-                        translations[key][langValue] = value
+    for key, value in StrFile.load(inputLocalizedFile).entries(includePadded=False):
+        if key in translations:
+            if value != translations[key].get('english', ''):
+                translations[key][langValue] = value
 
     # Restrict output to keys that still exist in the English file
     filtered_translations = {
@@ -1343,17 +2539,8 @@ def createWeblateMonolingualYamls(input_en, input_translated=None, langTag=None,
         print("Missing section_name (e.g., 'client', 'pregame'). Aborting.")
         return
 
-    def parse_lua_file(path):
-        entries = {}
-        for line in open(path, encoding="utf-8"):
-            ma = reClientUntaged.match(line)
-            if ma:
-                key, val = ma.group(1), ma.group(2)
-                entries[key] = val
-        return entries
-
-    en_data = parse_lua_file(input_en)
-    tr_data = parse_lua_file(input_translated) if input_translated else {}
+    en_data = StrFile.load(input_en).toDict(includePadded=False)
+    tr_data = StrFile.load(input_translated).toDict(includePadded=False) if input_translated else {}
 
     out_en_file = "{}.en.yaml".format(section_name)
     out_tr_file = "{}.{}.yaml".format(section_name, langTag)
@@ -1507,16 +2694,38 @@ def convertLangToPo(input_txt, output_po=None):
     print("PO output written to {}".format(output_po))
 
 
-def readTaggedLangFile(taggedFile, targetDict):
-    with open(taggedFile, 'r', encoding="utf8") as textIns:
+def iterTaggedLangFile(taggedFile, encoding="utf8"):
+    """Yield (key, text) for every {{key:}}text line of a tagged language file.
+
+    Pass encoding='esokr' to read a file in the ESO range as Korean text.
+    """
+    with open(taggedFile, 'r', encoding=encoding) as textIns:
         for line in textIns:
             maLangIndex = reLangIndex.match(line)
             if maLangIndex:
-                conIndex = maLangIndex.group(1)
-                conText = maLangIndex.group(2)
-                targetDict[conIndex] = conText
+                yield maLangIndex.group(1), maLangIndex.group(2)
+
 
+def readTaggedLangFile(taggedFile, targetDict, encoding="utf8"):
+    for conIndex, conText in iterTaggedLangFile(taggedFile, encoding):
+        targetDict[conIndex] = conText
 
+
+def writeTaggedEntries(entries, taggedFile, encoding="utf8"):
+    """Write a dict of key -> text as {{key:}}text lines."""
+    with open(taggedFile, 'w', encoding=encoding) as out:
+        out.writelines('{{{{{}:}}}}{}\n'.format(key, text) for key, text in entries.items())
+
+
+# Normalization ---------------------------------------------------------------
+reColorTagError = re.compile(r'(\|c000000)(\|c[0-9a-zA-Z]{6,6})')
+reColorTag = re.compile(r'\|c[0-9a-zA-Z]{1,6}|\|r')
+reControlChar = re.compile(r'\^f|\^n|\^F|\^N|\^p|\^P')
+# Live and PTS text share most values, so one diff cleans the same strings several times
+normalizeCacheSize = 1 << 18
+
+
+@functools.lru_cache(maxsize=normalizeCacheSize)
 def cleanText(line):
     if line is None:
         return None
@@ -1525,50 +2734,143 @@ def cleanText(line):
     line = line.replace('…', '').replace('—', '').replace('â€¦', '')
 
     # Remove unnecessary color tags
-    reColorTagError = re.compile(r'(\|c000000)(\|c[0-9a-zA-Z]{6,6})')
-    maColorTagError = reColorTagError.match(line)
-    if maColorTagError:
+    if line.startswith('|c000000') and reColorTagError.match(line):
         line = line.replace("|c000000", "")
 
     return line
 
 
-def calculate_similarity_and_threshold(text1, text2):
-    reColorTag = re.compile(r'\|c[0-9a-zA-Z]{1,6}|\|r')
-    reControlChar = re.compile(r'\^f|\^n|\^F|\^N|\^p|\^P')
+@functools.lru_cache(maxsize=normalizeCacheSize)
+def stripSimilarityMarkup(text):
+    """Remove color tags, then control characters, before comparing text."""
+    if '|' in text:
+        text = reColorTag.sub('', text)
+    if '^' in text:
+        text = reControlChar.sub('', text)
+    return text
 
-    if not text1 or not text2:
-        return False
 
-    subText1 = reColorTag.sub('', text1)
-    subText2 = reColorTag.sub('', text2)
-    subText1 = reControlChar.sub('', subText1)
-    subText2 = reControlChar.sub('', subText2)
+@mainFunction
+def benchmarkNormalization(translatedFilename, liveFilename, ptsFilename):
+    """
+    Time text normalization and a full diffIndexedLangText comparison, without writing files.
+
+    Args:
+        translatedFilename (str): The translated tagged language file.
+        liveFilename (str): The previous/live English tagged language file.
+        ptsFilename (str): The current/PTS English tagged language file.
 
-    similarity_ratio = SequenceMatcher(None, subText1, subText2).ratio()
+    Notes:
+        Prints the time to clean and strip every value of the three files once with empty caches,
+        once more with the caches filled, and the time of DiffEngine.diffIndexed on the files.
+    """
+    engine = DiffEngine()
+    sources = [engine.readTagged(filename) for filename in (translatedFilename, liveFilename, ptsFilename)]
+    texts = [text for source in sources for text in source.values()]
+    print("{} values, {} unique".format(len(texts), len(set(texts))))
+
+    cleanText.cache_clear()
+    stripSimilarityMarkup.cache_clear()
+    for label in ("empty cache", "filled cache"):
+        startTime = time.perf_counter()
+        for text in texts:
+            stripSimilarityMarkup(cleanText(text))
+        print("Normalize, {}: {:.3f}s".format(label, time.perf_counter() - startTime))
+
+    cleanText.cache_clear()
+    stripSimilarityMarkup.cache_clear()
+    startTime = time.perf_counter()
+    result = engine.diffIndexed(*sources)
+    print("diffIndexed: {:.3f}s for {} keys".format(time.perf_counter() - startTime, len(result)))
+    print("cleanText cache: {}".format(cleanText.cache_info()))
+
+
+# Similarity ------------------------------------------------------------------
+similarityThreshold = 0.6
+# Keys handed to a diff worker process at a time
+diffChunkSize = 2048
+# Code point bins of the histograms compared by similarityUpperBounds
+similarityHistogramBins = 256
+
+
+def boundedSimilarityRatio(text1, text2, threshold=similarityThreshold):
+    """
+    Return SequenceMatcher(None, text1, text2).ratio(), or an upper bound of it when it cannot exceed threshold.
 
-    return text1 == text2 or similarity_ratio > 0.6
+    The full ratio is only computed when two cheaper upper bounds of it pass the threshold:
+    the length bound of real_quick_ratio and the character histogram bound of quick_ratio.
+    Both use the same 2.0 * matches / length formula as ratio, so any ratio above threshold
+    is returned exactly, and a result not above threshold may be the failing bound.
 
+    Args:
+        text1 (str): The first text.
+        text2 (str): The second text.
+        threshold (float): The ratio to exceed. Default is 0.6.
 
-def calculate_similarity_ratio(text1, text2):
-    reColorTag = re.compile(r'\|c[0-9a-zA-Z]{1,6}|\|r')
-    reControlChar = re.compile(r'\^f|\^n|\^F|\^N|\^p|\^P')
+    Returns:
+        float: The similarity ratio, or an upper bound of it if it is not above threshold.
+    """
+    if text1 == text2:
+        return 1.0
+    length = len(text1) + len(text2)
+    bound = 2.0 * min(len(text1), len(text2)) / length
+    if bound <= threshold:
+        return bound
+    bound = 2.0 * sum((Counter(text1) & Counter(text2)).values()) / length
+    if bound <= threshold:
+        return bound
+    return SequenceMatcher(None, text1, text2).ratio()
+
+
+def similarityUpperBounds(pairs):
+    """
+    Return an upper bound of SequenceMatcher(None, text1, text2).ratio() for every (text1, text2) pair.
 
-    # Check if either text1 or text2 is None
-    if text1 is None or text2 is None:
-        return False
+    The characters of each text are counted into similarityHistogramBins bins by code point and
+    the histograms of each pair are intersected. Characters sharing a bin can only add matches, so
+    2.0 * matches / length stays an upper bound like quick_ratio. With NumPy the whole block is
+    counted in one pass; without it the same bins are counted per pair, so the bounds are equal.
 
-    # Remove color tags and control characters
-    subText1 = reColorTag.sub('', text1)
-    subText2 = reColorTag.sub('', text2)
-    subText1 = reControlChar.sub('', subText1)
-    subText2 = reControlChar.sub('', subText2)
+    Args:
+        pairs (list): (text1, text2) tuples.
 
-    # Calculate similarity ratio
-    similarity_ratio = SequenceMatcher(None, subText1, subText2).ratio()
+    Returns:
+        list: One float per pair, 1.0 for two empty texts.
+    """
+    if numpy is None or not pairs:
+        bounds = []
+        for text1, text2 in pairs:
+            if not text1 and not text2:
+                bounds.append(1.0)
+                continue
+            histogram1 = Counter(ord(char) % similarityHistogramBins for char in text1)
+            histogram2 = Counter(ord(char) % similarityHistogramBins for char in text2)
+            bounds.append(2.0 * sum((histogram1 & histogram2).values()) / (len(text1) + len(text2)))
+        return bounds
+    texts = [text1 for text1, _ in pairs] + [text2 for _, text2 in pairs]
+    lengths = numpy.fromiter(map(len, texts), dtype=numpy.int64, count=len(texts))
+    codes = numpy.frombuffer(''.join(texts).encode('utf-32-le'), dtype=numpy.uint32) % similarityHistogramBins
+    rows = numpy.repeat(numpy.arange(len(texts), dtype=numpy.int64), lengths)
+    histograms = numpy.bincount(rows * similarityHistogramBins + codes,
+                                minlength=len(texts) * similarityHistogramBins).reshape(len(texts), -1)
+    count = len(pairs)
+    matches = numpy.minimum(histograms[:count], histograms[count:]).sum(axis=1)
+    length = lengths[:count] + lengths[count:]
+    bounds = 2.0 * matches / numpy.maximum(length, 1)
+    bounds[length == 0] = 1.0
+    return bounds.tolist()
+
+
+def similarityScore(text1, text2):
+    """
+    Return the similarity of a live and a PTS text as used by the diff commands, 1.0 when they are equal.
 
-    # Return True only when similarity_ratio > 0.6
-    return similarity_ratio > 0.6
+    Color tags and control characters are removed before the texts are compared with
+    boundedSimilarityRatio, so a score not above similarityThreshold may be an upper bound.
+    """
+    if text1 == text2:
+        return 1.0
+    return boundedSimilarityRatio(stripSimilarityMarkup(text1), stripSimilarityMarkup(text2))
 
 
 @mainFunction
@@ -1620,8 +2922,185 @@ def mergeExtractedSectionIntoLang(fullLangFile, sectionLangFile, outputLangFile=
     print("Merged translations from {} into {} → {}".format(sectionLangFile, fullLangFile, outputLangFile))
 
 
+# Diff engine -----------------------------------------------------------------
+DiffEntry = namedtuple('DiffEntry', 'category similar score text')
+DiffEntry.__doc__ = """Result of one key of a diff.
+
+category is one of 'added', 'matched', 'close', 'changed' or 'deleted' ('translated',
+'untranslated' or 'empty' for ESOUI text) and text the text chosen for the output.
+similar is the flag written to verify_output.txt, whether the live and PTS text are above
+the similarity threshold. score is their SequenceMatcher ratio, 1.0 for equal texts; a score
+not above the threshold can be the upper bound that let the comparison stop early. Both are
+None when the texts were not compared.
+"""
+
+
+class DiffResult:
+    """
+    Per-key outcome of a DiffEngine diff, in PTS order with deleted keys last.
+
+    The input dicts are kept so the result can be written in the format of the command that
+    produces it: write() creates the same files as diffIndexedLangText, diffEsouiText or
+    diffEnglishLangFiles. Nothing is written unless asked for.
+    """
+
+    def __init__(self, kind, translated, live, pts):
+        self.kind = kind
+        self.translated = translated
+        self.live = live
+        self.pts = pts
+        self.entries = {}
+
+    def __getitem__(self, key):
+        return self.entries[key]
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def counts(self):
+        """Return a Counter of entries per category."""
+        return Counter(entry.category for entry in self.entries.values())
+
+    def keys(self, category=None):
+        """Return the keys of every entry, or only those of one category."""
+        return [key for key, entry in self.entries.items() if category is None or entry.category == category]
+
+    def texts(self):
+        """Return the chosen text by key, without deleted keys."""
+        return {key: entry.text for key, entry in self.entries.items() if entry.category != 'deleted'}
+
+    def writeVerify(self, verifyOut):
+        """Write the verify_output.txt lines of a diffIndexed result to an open file."""
+        for key, entry in self.entries.items():
+            writeDiffVerify(verifyOut, key, self.translated.get(key), self.live.get(key), self.pts[key], entry)
+
+    def writeEsoui(self, filename):
+        """Write a diffEsoui result as [key] = "text" lines."""
+        with open(filename, 'w', encoding="utf8") as out:
+            for key, entry in self.entries.items():
+                escaped = preserve_escaped_sequences(entry.text)
+                formatted = '[{}] = "{}"\n'.format(key, escaped)
+                out.write(restore_escaped_sequences(formatted))
+
+    def writeEnglishReports(self, outDir="."):
+        """Write the matched, close match, changed, deleted and added reports of a diffEnglish result."""
+        reports = {category: [] for category in ('added', 'matched', 'close', 'changed', 'deleted')}
+        closeMatchPtsText = []
+        for key, entry in self.entries.items():
+            if entry.category == 'close':
+                reports['close'].append('{{{{{}:}}}}{}\n'.format(key, self.live[key]))
+                closeMatchPtsText.append('{{{{{}:}}}}{}\n'.format(key, entry.text))
+            elif entry.category == 'changed':
+                reports['changed'].append('{{{{{}:pts:}}}}{}\n{{{{{}:live:}}}}{}\n\n'.format(
+                    key, entry.text, key, self.live[key]))
+            else:
+                reports[entry.category].append('{{{{{}:}}}}{}\n'.format(key, entry.text))
+
+        for filename, lines, description in (
+                ("matchedIndexes.txt", reports['matched'], 'matched'),
+                ("closeMatchLiveIndexes.txt", reports['close'], 'were a close match'),
+                ("closeMatchPtsIndexes.txt", closeMatchPtsText, 'were a close match'),
+                ("changedIndexes.txt", reports['changed'], 'changed'),
+                ("deletedIndexes.txt", reports['deleted'], 'deleted'),
+                ("addedIndexes.txt", reports['added'], 'added')):
+            with open(os.path.join(outDir, filename), 'w', encoding="utf8") as out:
+                out.write('{}: indexes {}\n'.format(len(lines), description))
+                out.writelines(lines)
+
+    def write(self, outDir="."):
+        """Write the output files of the command that produces this kind of result."""
+        if self.kind == 'indexed':
+            writeTaggedEntries(self.texts(), os.path.join(outDir, "output.txt"))
+            with open(os.path.join(outDir, "verify_output.txt"), 'w', encoding="utf8") as verifyOut:
+                self.writeVerify(verifyOut)
+        elif self.kind == 'esoui':
+            self.writeEsoui(os.path.join(outDir, "output.txt"))
+        else:
+            self.writeEnglishReports(outDir)
+
+
+class DiffEngine:
+    """
+    Diff language texts without touching the module level dictionaries.
+
+    Every diff takes dicts of key -> text, or filenames that are read into new dicts, and
+    returns a DiffResult, so one process can diff any number of language pairs in a row.
+
+    Args:
+        jobs (int): Number of worker processes comparing blocks of keys. Default is 1.
+
+    Example:
+        ```
+        engine = DiffEngine()
+        result = engine.diffIndexed('kr.lang_tag.txt', 'en_prv.lang_tag.txt', 'en_cur.lang_tag.txt')
+        changedKeys = result.keys('changed')
+        result.write('kr_update')
+        ```
+    """
+
+    def __init__(self, jobs=1):
+        self.jobs = jobs
+
+    @staticmethod
+    def readTagged(source):
+        """Return a tagged language file as a dict, or source itself if it is already one."""
+        if isinstance(source, dict):
+            return source
+        entries = {}
+        readTaggedLangFile(source, entries)
+        return entries
+
+    @staticmethod
+    def readEsoui(source):
+        """Return the entries of an ESOUI .str file as a dict, or source itself if it is already one."""
+        if isinstance(source, dict):
+            return source
+        entries = {}
+        processEosuiTextFile(source, entries)
+        return entries
+
+    def diffIndexed(self, translated, live, pts):
+        """Merge translations into the PTS text with the rules of diffIndexedLangText."""
+        translated, live, pts = self.readTagged(translated), self.readTagged(live), self.readTagged(pts)
+        result = DiffResult('indexed', translated, live, pts)
+        keys = list(pts)
+        texts = ((translated.get(key), live.get(key), pts[key]) for key in keys)
+        if self.jobs > 1:
+            decisions = mapDiffChunks(diffIndexedLangChunk, texts, self.jobs)
+        else:
+            decisions = itertools.starmap(diffIndexedLangKey, texts)
+        for key, entry in zip(keys, decisions):
+            if entry is not None:
+                result.entries[key] = entry
+        return result
+
+    def diffEsoui(self, translated, live, pts):
+        """Merge translations into the PTS .str text with the rules of diffEsouiText."""
+        translated, live, pts = self.readEsoui(translated), self.readEsoui(live), self.readEsoui(pts)
+        result = DiffResult('esoui', translated, live, pts)
+        for key, ptsText in pts.items():
+            result.entries[key] = diffEsouiKey(translated.get(key), ptsText)
+        return result
+
+    def diffEnglish(self, live, pts):
+        """Classify every key of two English versions with the rules of diffEnglishLangFiles."""
+        live, pts = self.readTagged(live), self.readTagged(pts)
+        result = DiffResult('english', {}, live, pts)
+        categories, scores = classifyEnglishKeys(live, pts, self.jobs)
+        for key, category, score in zip(pts, categories, scores):
+            similar = None if category == 'added' else category != 'changed'
+            result.entries[key] = DiffEntry(category, similar, score, pts[key])
+        for key, liveText in live.items():
+            if key not in pts:
+                result.entries[key] = DiffEntry('deleted', None, None, liveText)
+        return result
+
+
 @mainFunction
-def diffIndexedLangText(translatedFilename, unTranslatedLiveFilename, unTranslatedPTSFilename):
+def diffIndexedLangText(translatedFilename, unTranslatedLiveFilename, unTranslatedPTSFilename, jobs=1):
     """
     Compare translations between different versions of language files.
 
@@ -1631,6 +3110,8 @@ def diffIndexedLangText(translatedFilename, unTranslatedLiveFilename, unTranslat
         translatedFilename (str): The filename of the translated language file (e.g., kb.lang.txt).
         unTranslatedLiveFilename (str): The filename of the previous/live English language file with tags (e.g., en_prv.lang_tag.txt).
         unTranslatedPTSFilename (str): The filename of the current/PTS English language file with tags (e.g., en_cur.lang_tag.txt).
+        jobs (int): Number of worker processes comparing blocks of keys (also set with --jobs N).
+                    The output is the same for any value. Default is 1.
 
     Notes:
         - `translatedFilename` should be the translated language file, usually for another language.
@@ -1645,66 +3126,160 @@ def diffIndexedLangText(translatedFilename, unTranslatedLiveFilename, unTranslat
     - Writes the output to "output.txt" with potential new translations and to "verify_output.txt" for verification purposes.
     """
 
+    engine = DiffEngine(int(jobs))
     # Get Previous Translation ------------------------------------------------------
-    readTaggedLangFile(translatedFilename, textTranslatedDict)
+    translatedDict = engine.readTagged(translatedFilename)
     print("Processed Translated Text")
     # Get Previous/Live English Text ------------------------------------------------------
-    readTaggedLangFile(unTranslatedLiveFilename, textUntranslatedLiveDict)
+    liveDict = engine.readTagged(unTranslatedLiveFilename)
     print("Processed Previous Text")
     # Get Current/PTS English Text ------------------------------------------------------
-    readTaggedLangFile(unTranslatedPTSFilename, textUntranslatedPTSDict)
+    ptsDict = engine.readTagged(unTranslatedPTSFilename)
     print("Processed Current Text")
     # Compare PTS with Live text, write output -----------------------------------------
     print("Begining Comparison")
+    engine.diffIndexed(translatedDict, liveDict, ptsDict).write()
+
+
+def mapDiffChunks(worker, items, jobs):
+    """Run worker over blocks of items in jobs processes and yield its results in the original order."""
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for results in executor.map(worker, diffChunks(items)):
+            yield from results
+
+
+def diffChunks(items):
+    """Yield lists of up to diffChunkSize items."""
+    items = iter(items)
+    return iter(lambda: list(itertools.islice(items, diffChunkSize)), [])
+
+
+def diffIndexedLangKey(translatedText, liveText, ptsText):
+    """
+    Decide one key for DiffEngine.diffIndexed.
+
+    Returns:
+        DiffEntry: 'added' without live text, 'matched' or 'close' when the translation is kept, and
+        'changed' when the PTS text is used and the entry goes to verify_output.txt. None drops the key.
+    """
+    translatedTextStripped = cleanText(translatedText)
+    liveTextStripped = cleanText(liveText)
+    ptsTextStripped = cleanText(ptsText)
+    # -- Assign lineOut to ptsText
+    lineOut = ptsText
+    useTranslatedText = False
+    writeOutput = False
+    # ---Determine Change Ratio between Live and Pts---
+    liveAndPtsGreaterThanThreshold = False
+    score = None
+    # live deleted, discard live text
+    # live and pts the same, use translation
+    # live and pts slightly different, use translation
+    # live and pts very different, use pts Text
+    # pts new line, use pts Text
+    if liveTextStripped is not None and ptsTextStripped is None:
+        return None
+    if liveTextStripped is not None and ptsTextStripped is not None:
+        score = similarityScore(liveTextStripped, ptsTextStripped)
+        liveAndPtsGreaterThanThreshold = score > similarityThreshold
+        if liveTextStripped == ptsTextStripped or liveAndPtsGreaterThanThreshold:
+            useTranslatedText = True
+        if not liveAndPtsGreaterThanThreshold:
+            useTranslatedText = False
+            writeOutput = True
+    if liveTextStripped is None and ptsTextStripped is not None:
+        useTranslatedText = False
+
+    if useTranslatedText and translatedText is not None:
+        lineOut = translatedText
+    if liveTextStripped is None:
+        return DiffEntry('added', None, None, lineOut.rstrip())
+    if writeOutput:
+        category = 'changed'
+    elif liveTextStripped == ptsTextStripped:
+        category = 'matched'
+    else:
+        category = 'close'
+    return DiffEntry(category, liveAndPtsGreaterThanThreshold, score, lineOut.rstrip())
+
+
+def diffIndexedLangChunk(items):
+    """Worker for DiffEngine.diffIndexed: decide a block of (translated, live, pts) texts."""
+    return [diffIndexedLangKey(*texts) for texts in items]
+
+
+def writeDiffVerify(verifyOut, key, translatedText, liveText, ptsText, entry):
+    """Save a questionable comparison of diffIndexedLangKey to verify_output.txt."""
+    if entry.category != 'changed':
+        return
+    if translatedText is not None:
+        verifyOut.write('T{{{{{}:}}}}{}\n'.format(key, translatedText.rstrip()))
+    verifyOut.write('L{{{{{}:}}}}{}\n'.format(key, liveText.rstrip()))
+    verifyOut.write('P{{{{{}:}}}}{}\n'.format(key, ptsText.rstrip()))
+    verifyOut.write('{{{}}}:{{{{{{{}:}}}}{}\n}}\n'.format(entry.similar, key, entry.text))
+
+
+def iterSortedTaggedLangFile(taggedFile):
+    """
+    Yield (packedKey, key, text) for a tagged file whose keys are in ascending index order.
+
+    Raises:
+        ValueError: For a malformed key, or a key not greater than the one before it.
+    """
+    previousKey = None
+    for key, text in iterTaggedLangFile(taggedFile):
+        packedKey = parseLangKey(key)
+        if packedKey is None:
+            raise ValueError("{}: {} is not a sectionId-sectionIndex-stringIndex key".format(taggedFile, key))
+        if previousKey is not None and packedKey <= previousKey:
+            raise ValueError("{}: {} is not in ascending index order, use diffIndexedLangText".format(taggedFile, key))
+        previousKey = packedKey
+        yield packedKey, key, text
+
+
+@mainFunction
+def diffSortedLangText(translatedFilename, unTranslatedLiveFilename, unTranslatedPTSFilename):
+    """
+    Compare translations like diffIndexedLangText, streaming files that are sorted by index.
+
+    The three files are read side by side in a merge-join on the sectionId-sectionIndex-stringIndex
+    key and every result is written as soon as it is decided, so memory use does not grow with the
+    size of the files. The output is the same as diffIndexedLangText.
+
+    Args:
+        translatedFilename (str): The filename of the translated language file (e.g., kb.lang.txt).
+        unTranslatedLiveFilename (str): The filename of the previous/live English language file with tags (e.g., en_prv.lang_tag.txt).
+        unTranslatedPTSFilename (str): The filename of the current/PTS English language file with tags (e.g., en_cur.lang_tag.txt).
+
+    Notes:
+        - Keys must be unique and in ascending (sectionId, sectionIndex, stringIndex) order in every file.
+          The index table of a .lang file is not in this order, export the files with
+          exportLangToTagged(..., sortByIndex=True). Use diffIndexedLangText for unsorted files.
+        - The order of the three files is checked before any output is written. A ValueError names
+          the first key out of order.
+        - The output is written to "output.txt" and "verify_output.txt" files.
+    """
+    for filename in (translatedFilename, unTranslatedLiveFilename, unTranslatedPTSFilename):
+        for _ in iterSortedTaggedLangFile(filename):
+            pass
+    translatedEntries = iterSortedTaggedLangFile(translatedFilename)
+    liveEntries = iterSortedTaggedLangFile(unTranslatedLiveFilename)
+    translated = next(translatedEntries, None)
+    live = next(liveEntries, None)
     with open("output.txt", 'w', encoding="utf8") as out:
         with open("verify_output.txt", 'w', encoding="utf8") as verifyOut:
-            for key in textUntranslatedPTSDict:
-                translatedText = textTranslatedDict.get(key)
-                liveText = textUntranslatedLiveDict.get(key)
-                ptsText = textUntranslatedPTSDict.get(key)
-                translatedTextStripped = cleanText(translatedText)
-                liveTextStripped = cleanText(liveText)
-                ptsTextStripped = cleanText(ptsText)
-                # -- Assign lineOut to ptsText
-                lineOut = ptsText
-                useTranslatedText = False
-                hasExtendedChars = isTranslatedText(translatedTextStripped)
-                writeOutput = False
-                # ---Determine Change Ratio between Live and Pts---
-                liveAndPtsGreaterThanThreshold = False
-                # ---Determine Change Ratio between Translated and Pts ---
-                # translatedAndPtsGreaterThanThreshold = calculate_similarity_ratio(translatedTextStripped, ptsTextStripped)
-                # live deleted, discard live text
-                # live and pts the same, use translation
-                # live and pts slightly different, use translation
-                # live and pts very different, use pts Text
-                # pts new line, use pts Text
-
-                # hasTranslation is not named well, it means that it is acceptable to use
-                # translated text if it exists
-                if liveTextStripped is not None and ptsTextStripped is None:
+            for packedKey, key, ptsText in iterSortedTaggedLangFile(unTranslatedPTSFilename):
+                while translated is not None and translated[0] < packedKey:
+                    translated = next(translatedEntries, None)
+                while live is not None and live[0] < packedKey:
+                    live = next(liveEntries, None)
+                translatedText = translated[2] if translated is not None and translated[0] == packedKey else None
+                liveText = live[2] if live is not None and live[0] == packedKey else None
+                entry = diffIndexedLangKey(translatedText, liveText, ptsText)
+                if entry is None:
                     continue
-                if liveTextStripped is not None and ptsTextStripped is not None:
-                    liveAndPtsGreaterThanThreshold = calculate_similarity_ratio(liveTextStripped, ptsTextStripped)
-                    if liveTextStripped == ptsTextStripped or liveAndPtsGreaterThanThreshold:
-                        useTranslatedText = True
-                    if not liveAndPtsGreaterThanThreshold:
-                        useTranslatedText = False
-                        writeOutput = True
-                if liveTextStripped is None and ptsTextStripped is not None:
-                    useTranslatedText = False
-
-                if useTranslatedText and translatedText is not None:
-                    lineOut = translatedText
-                lineOut = '{{{{{}:}}}}{}\n'.format(key, lineOut.rstrip())
-                # -- Save questionable comparison to verify
-                if writeOutput:
-                    if translatedText is not None:
-                        verifyOut.write('T{{{{{}:}}}}{}\n'.format(key, translatedText.rstrip()))
-                    verifyOut.write('L{{{{{}:}}}}{}\n'.format(key, liveText.rstrip()))
-                    verifyOut.write('P{{{{{}:}}}}{}\n'.format(key, ptsText.rstrip()))
-                    verifyOut.write('{{{}}}:{{{}}}\n'.format(liveAndPtsGreaterThanThreshold, lineOut))
-                out.write(lineOut)
+                out.write('{{{{{}:}}}}{}\n'.format(key, entry.text))
+                writeDiffVerify(verifyOut, key, translatedText, liveText, ptsText, entry)
 
 
 @mainFunction
@@ -1729,47 +3304,113 @@ def diffEsouiText(translatedFilename, liveFilename, ptsFilename):
     merged entries with translated text if available.
 
     """
+    engine = DiffEngine()
     # Read translated text ----------------------------------------------------
-    processEosuiTextFile(translatedFilename, textTranslatedDict)
+    translatedDict = engine.readEsoui(translatedFilename)
     # Read live text ----------------------------------------------------
-    processEosuiTextFile(liveFilename, textUntranslatedLiveDict)
+    liveDict = engine.readEsoui(liveFilename)
     # Read pts text ----------------------------------------------------
-    processEosuiTextFile(ptsFilename, textUntranslatedPTSDict)
+    ptsDict = engine.readEsoui(ptsFilename)
     # --Write Output ------------------------------------------------------
-    with open("output.txt", 'w', encoding="utf8") as out:
-        for key in textUntranslatedPTSDict:
-            translatedText = textTranslatedDict.get(key)
-            liveText = textUntranslatedLiveDict.get(key)
-            ptsText = textUntranslatedPTSDict.get(key)
-            maEmptyString = reEmptyString.match(ptsText)
-            if maEmptyString:
-                conIndex = maEmptyString.group(1)
-                lineOut = '[{}] = ""\n'.format(conIndex)
-                out.write(lineOut)
-                continue
-            hasExtendedChars = isTranslatedText(translatedText)
-            hasTranslation = False
-            outputText = ptsText
-
-            if translatedText is not None and (translatedText != ""):
-                if (translatedText != ptsText):
-                    hasTranslation = True
-            if not hasTranslation and hasExtendedChars:
-                hasTranslation = True
-            if translatedText is None:
-                hasTranslation = False
-
-            if hasTranslation:
-                outputText = translatedText
-
-            escaped = preserve_escaped_sequences(outputText)
-            formatted = '[{}] = "{}"\n'.format(key, escaped)
-            restored = restore_escaped_sequences(formatted)
-            out.write(restored)
+    engine.diffEsoui(translatedDict, liveDict, ptsDict).write()
+
+
+def diffEsouiKey(translatedText, ptsText):
+    """
+    Decide one key for DiffEngine.diffEsoui: 'empty', 'translated' or 'untranslated'.
+
+    An 'empty' entry has empty text and is written as [key] = "" like any other entry.
+    """
+    if reEmptyString.match(ptsText):
+        return DiffEntry('empty', None, None, '')
+    hasExtendedChars = isTranslatedText(translatedText)
+    hasTranslation = False
+    outputText = ptsText
+
+    if translatedText is not None and (translatedText != ""):
+        if (translatedText != ptsText):
+            hasTranslation = True
+    if not hasTranslation and hasExtendedChars:
+        hasTranslation = True
+    if translatedText is None:
+        hasTranslation = False
+
+    if hasTranslation:
+        return DiffEntry('translated', None, None, translatedText)
+    return DiffEntry('untranslated', None, None, outputText)
+
+
+def classifyEnglishKeys(liveDict, ptsDict, jobs=1):
+    """
+    Return the diffEnglishLangFiles categories and similarity scores of the keys of ptsDict, in order.
+
+    Added and matched keys are decided by a lookup and string equality. Only the other keys are
+    compared, and keys with the same live and PTS text as an earlier key share its result, so
+    repeated phrasing is compared once.
+    """
+    keys = list(ptsDict)
+    categories = [None] * len(keys)
+    scores = [None] * len(keys)
+    rowsByTexts = {}
+    for row, key in enumerate(keys):
+        liveText = liveDict.get(key)
+        if liveText is None:
+            categories[row] = 'added'
+            continue
+        ptsText = ptsDict[key]
+        if liveText == ptsText:
+            categories[row] = 'matched'
+            scores[row] = 1.0
+            continue
+        rowsByTexts.setdefault((liveText, ptsText), []).append(row)
+
+    if jobs > 1:
+        results = mapDiffChunks(classifyEnglishChunk, rowsByTexts, jobs)
+    else:
+        results = itertools.chain.from_iterable(map(classifyEnglishChunk, diffChunks(rowsByTexts)))
+    for rows, (category, score) in zip(rowsByTexts.values(), results):
+        for row in rows:
+            categories[row], scores[row] = category, score
+    return categories, scores
+
+
+def classifyEnglishChunk(items):
+    """
+    Worker for diffEnglishLangFiles: return (category, score) for a block of (live, pts) texts.
+
+    category is 'added', 'matched', 'close' or 'changed' and score as in DiffEntry, None for an
+    added key or an empty text.
+
+    A changed key is 'close' when both texts are non-empty and, with color tags and control
+    characters removed, they are equal or their SequenceMatcher ratio is above similarityThreshold.
+    The similarity bounds of the whole block are computed together by similarityUpperBounds, only
+    the pairs whose bound passes similarityThreshold get the exact SequenceMatcher ratio.
+    """
+    results = []
+    pending = []
+    for row, (liveText, ptsText) in enumerate(items):
+        if liveText is None:
+            results.append(('added', None))
+        elif liveText == ptsText:
+            results.append(('matched', 1.0))
+        elif not liveText or not ptsText:
+            results.append(('changed', None))
+        else:
+            liveText, ptsText = stripSimilarityMarkup(liveText), stripSimilarityMarkup(ptsText)
+            results.append(('close', 1.0))
+            if liveText != ptsText:
+                pending.append((row, liveText, ptsText))
+
+    bounds = similarityUpperBounds([(liveText, ptsText) for _, liveText, ptsText in pending])
+    for (row, liveText, ptsText), score in zip(pending, bounds):
+        if score > similarityThreshold:
+            score = SequenceMatcher(None, liveText, ptsText).ratio()
+        results[row] = ('close' if score > similarityThreshold else 'changed', score)
+    return results
 
 
 @mainFunction
-def diffEnglishLangFiles(LiveFilename, ptsFilename):
+def diffEnglishLangFiles(LiveFilename, ptsFilename, jobs=1):
     """
     Compare differences between the current and PTS 'en.lang' files after conversion to text and tagging.
 
@@ -1779,6 +3420,8 @@ def diffEnglishLangFiles(LiveFilename, ptsFilename):
     Args:
         LiveFilename (str): The filename of the previous/live 'en.lang' file with tags.
         ptsFilename (str): The filename of the current/PTS 'en.lang' file with tags.
+        jobs (int): Number of worker processes classifying blocks of keys (also set with --jobs N).
+                    The output is the same for any value. Default is 1.
 
     Notes:
         The function reads the translation data from the specified files using the 'readTaggedLangFile' function.
@@ -1801,76 +3444,509 @@ def diffEnglishLangFiles(LiveFilename, ptsFilename):
     - 'addedIndexes.txt': Indexes that are newly added in the PTS version.
     """
 
-    def write_output_file(filename, targetList, targetCount, targetString):
-        with open(filename, 'w', encoding="utf8") as out:
-            lineOut = '{}: indexes {}\n'.format(targetCount, targetString)
-            out.write(lineOut)
-            for i in range(len(targetList)):
-                lineOut = targetList[i]
-                out.write(lineOut)
-
+    engine = DiffEngine(int(jobs))
     # Get Previous/Live English Text ------------------------------------------------------
-    readTaggedLangFile(LiveFilename, textUntranslatedLiveDict)
+    liveDict = engine.readTagged(LiveFilename)
     # Get Current/PTS English Text ------------------------------------------------------
-    readTaggedLangFile(ptsFilename, textUntranslatedPTSDict)
+    ptsDict = engine.readTagged(ptsFilename)
     # Compare PTS with Live text, write output -----------------------------------------
-    matchedText = []
-    closeMatchLiveText = []
-    closeMatchPtsText = []
-    changedText = []
-    deletedText = []
-    addedText = []
-    addedIndexCount = 0
-    matchedCount = 0
-    closMatchCount = 0
-    changedCount = 0
-    deletedCount = 0
-    for key in textUntranslatedPTSDict:
-        ptsText = textUntranslatedPTSDict.get(key)
-        liveText = textUntranslatedLiveDict.get(key)
-        if textUntranslatedLiveDict.get(key) is None:
-            addedIndexCount = addedIndexCount + 1
-            lineOut = '{{{{{}:}}}}{}\n'.format(key, ptsText)
-            addedText.append(lineOut)
+    result = engine.diffEnglish(liveDict, ptsDict)
+    counts = result.counts()
+    print('{}: new indexes added'.format(counts['added']))
+    print('{}: indexes matched'.format(counts['matched']))
+    print('{}: indexes were a close match'.format(counts['close']))
+    print('{}: indexes changed'.format(counts['changed']))
+    print('{}: indexes deleted'.format(counts['deleted']))
+    result.write()
+
+
+# Translation memory ----------------------------------------------------------
+"""
+Near-duplicate text is found with MinHash locality sensitive hashing. Each text is cut into
+character shingles. One-permutation MinHash keeps the smallest shingle hash in each of
+minHashBands * minHashRows slots, and empty slots borrow the next filled one. Texts sharing
+all slots of any band land in the same bucket, so a lookup only compares the texts of its
+buckets instead of every entry. With 10 bands of 3 rows, pairs with a shingle Jaccard
+similarity of about 0.45 or more are likely to meet in a bucket.
+"""
+minHashShingleSize = 3
+minHashBands = 10
+minHashRows = 3
+# Candidates checked with SequenceMatcher per lookup, the ones sharing most buckets first
+lshMaxCandidates = 32
+# Rows read from each bucket per lookup, the latest first. Common short texts fill huge
+# buckets whose rows are all alike, and reading them whole would make lookups linear.
+lshMaxBucketScan = 256
+# Candidates whose signatures agree in fewer slots than this share too few shingles to be
+# similar and are dropped before any SequenceMatcher work
+lshMinSignatureMatch = 0.2
+
+
+def minHashSignature(text, size=minHashBands * minHashRows):
+    """Return the one-permutation MinHash signature of the character shingles of text."""
+    slots = [None] * size
+    shingleCount = max(1, len(text) - minHashShingleSize + 1)
+    for shingle in {text[i:i + minHashShingleSize] for i in range(shingleCount)}:
+        shingleHash = zlib.crc32(shingle.encode('utf8'))
+        slot = shingleHash % size
+        value = shingleHash // size
+        if slots[slot] is None or value < slots[slot]:
+            slots[slot] = value
+    if None not in slots:
+        return slots
+    # Densify: an empty slot takes the value of the next filled slot, marked with its distance
+    nextValue = None
+    for slot in range(2 * size - 1, -1, -1):
+        value = slots[slot % size]
+        if value is not None:
+            nextValue = value
+            distance = 0
+        elif nextValue is not None:
+            distance += 1
+            if slot < size:
+                slots[slot] = nextValue + (distance << 32)
+    return slots
+
+
+def lshBandKeys(signature):
+    """Yield one hashable bucket key per band of a MinHash signature."""
+    for band in range(minHashBands):
+        yield band, tuple(signature[band * minHashRows:(band + 1) * minHashRows])
+
+
+class LshIndex:
+    """
+    MinHash LSH buckets of row numbers, for finding texts similar to a given text.
+
+    Texts are added with the row number the caller uses for them. candidates returns the
+    rows sharing at least one bucket with a text, the rows sharing most buckets first, after
+    dropping those whose signature agrees with the text in too few slots. Only the 2 * limit
+    rows sharing most buckets are considered.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.signatures = {}
+
+    def add(self, row, text, signature=None):
+        if signature is None:
+            signature = minHashSignature(text)
+        self.signatures[row] = signature
+        for bandKey in lshBandKeys(signature):
+            self.buckets.setdefault(bandKey, []).append(row)
+
+    def candidates(self, text, limit=lshMaxCandidates, minSignatureMatch=lshMinSignatureMatch, signature=None):
+        if signature is None:
+            signature = minHashSignature(text)
+        sharedBands = Counter()
+        for bandKey in lshBandKeys(signature):
+            sharedBands.update(self.buckets.get(bandKey, ())[-lshMaxBucketScan:])
+        minMatches = minSignatureMatch * len(signature)
+        candidates = []
+        for row, count in sharedBands.most_common(2 * limit):
+            if sum(map(operator.eq, signature, self.signatures[row])) >= minMatches:
+                candidates.append(row)
+                if len(candidates) == limit:
+                    break
+        return candidates
+
+
+def normalizeForMatching(text):
+    """Return text cleaned and stripped the way the diff compares live and PTS text."""
+    return stripSimilarityMarkup(cleanText(text))
+
+
+class TranslationMemory:
+    """
+    Index of existing translations by their English text.
+
+    Sources and translations are parallel lists. exactRows maps normalized English text to
+    its first row, and the LshIndex finds rows whose English text is similar.
+
+    Example:
+        ```
+        memory = TranslationMemory.fromTagged(translatedDict, liveDict)
+        match = memory.lookup(ptsText)
+        if match:
+            sourceKey, translation, score = match
+        ```
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.sources = []
+        self.translations = []
+        self.exactRows = {}
+        self.index = LshIndex()
+
+    @classmethod
+    def fromTagged(cls, translated, live):
+        """Build a memory from every key whose translated text differs from its live English text."""
+        memory = cls()
+        for key, translatedText in translated.items():
+            liveText = live.get(key)
+            if liveText is not None and translatedText and translatedText != liveText:
+                memory.add(key, liveText, translatedText)
+        return memory
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, english, translation):
+        source = normalizeForMatching(english)
+        if not source or source in self.exactRows:
+            return
+        row = len(self.keys)
+        self.keys.append(key)
+        self.sources.append(source)
+        self.translations.append(translation)
+        self.exactRows[source] = row
+        self.index.add(row, source)
+
+    def lookup(self, english, threshold=similarityThreshold):
+        """
+        Return (key, translation, score) of the most similar English text, or None.
+
+        score is the SequenceMatcher ratio of the normalized texts, 1.0 for an exact match.
+        Only matches with a score above threshold are returned.
+        """
+        source = normalizeForMatching(english)
+        if not source:
+            return None
+        row = self.exactRows.get(source)
+        if row is not None:
+            return self.keys[row], self.translations[row], 1.0
+        bestRow = None
+        bestScore = threshold
+        for row in self.index.candidates(source):
+            score = boundedSimilarityRatio(source, self.sources[row], bestScore)
+            if score > bestScore:
+                bestRow, bestScore = row, score
+        if bestRow is None:
+            return None
+        return self.keys[bestRow], self.translations[bestRow], bestScore
+
+
+@mainFunction
+def suggestTranslations(translatedFilename, unTranslatedLiveFilename, unTranslatedPTSFilename):
+    """
+    Suggest existing translations for the entries diffIndexedLangText leaves in English.
+
+    The translated and live files form a translation memory of English text -> translation.
+    Every key that diffIndexedLangText outputs in English, because it is new or its text
+    changed too much, is looked up by its PTS text. The exact English text is tried first,
+    then similar text from other keys found through MinHash buckets.
+
+    Args:
+        translatedFilename (str): The filename of the translated language file (e.g., kb.lang.txt).
+        unTranslatedLiveFilename (str): The filename of the previous/live English language file with tags.
+        unTranslatedPTSFilename (str): The filename of the current/PTS English language file with tags.
+
+    Notes:
+        - "suggest_output.txt" holds {{key:}}translation lines for the keys with a suggestion and can be
+          merged with mergeExtractedSectionIntoLang.
+        - "suggest_verify.txt" lists the PTS text, the English text of the key the suggestion comes from
+          and the similarity score of every suggestion.
+    """
+    engine = DiffEngine()
+    translatedDict = engine.readTagged(translatedFilename)
+    liveDict = engine.readTagged(unTranslatedLiveFilename)
+    ptsDict = engine.readTagged(unTranslatedPTSFilename)
+    memory = TranslationMemory.fromTagged(translatedDict, liveDict)
+    print("{} translations in memory".format(len(memory)))
+
+    result = engine.diffIndexed(translatedDict, liveDict, ptsDict)
+    fallbackKeys = [key for key, entry in result.entries.items() if entry.category in ('added', 'changed')]
+    suggestedCount = 0
+    with open("suggest_output.txt", 'w', encoding="utf8") as out:
+        with open("suggest_verify.txt", 'w', encoding="utf8") as verifyOut:
+            for key in fallbackKeys:
+                match = memory.lookup(ptsDict[key])
+                if match is None:
+                    continue
+                sourceKey, translation, score = match
+                suggestedCount += 1
+                out.write('{{{{{}:}}}}{}\n'.format(key, translation.rstrip()))
+                verifyOut.write('P{{{{{}:}}}}{}\n'.format(key, ptsDict[key].rstrip()))
+                verifyOut.write('E{{{{{}:}}}}{}\n'.format(sourceKey, liveDict[sourceKey].rstrip()))
+                verifyOut.write('{{{:.3f}}}:{{{{{}:}}}}{}\n\n'.format(score, key, translation.rstrip()))
+    print("{} of {} English entries have a suggestion".format(suggestedCount, len(fallbackKeys)))
+
+
+# Near duplicates need more shingles in common than translation memory matches
+duplicateMinSignatureMatch = 0.4
+
+
+def findGroupRoot(parents, row):
+    """Return the root of row in a union-find parent list, halving the path on the way."""
+    while parents[row] != row:
+        parents[row] = parents[parents[row]]
+        row = parents[row]
+    return row
+
+
+@mainFunction
+def findNearDuplicates(taggedFile, liveFilename=None, threshold=0.8, outputFile="duplicateGroups.txt"):
+    """
+    Group the entries of a tagged language file whose text is the same or nearly the same.
+
+    Entries with the same normalized text are grouped directly. Each distinct text is then
+    compared only with the candidates of its MinHash buckets, and pairs whose SequenceMatcher
+    ratio is above threshold join their groups with union-find. Run time grows with the number
+    of entries rather than with the number of pairs.
+
+    Args:
+        taggedFile (str): The tagged language file to search (e.g., en_cur.lang_tag.txt).
+        liveFilename (str, optional): The previous/live tagged file. When given, only groups holding at
+                                      least one key that is new since live are written.
+        threshold (float): The similarity ratio a pair must exceed. Default is 0.8.
+        outputFile (str): The file to write the groups to. Default is "duplicateGroups.txt".
+
+    Notes:
+        Each group starts with a line giving its size, number of sections and lowest score. Every
+        member line holds its best score against another member (1.000 for identical text), the
+        section name and the {{key:}}text entry. Groups with the most keys come first.
+    """
+    threshold = float(threshold)
+    entries = DiffEngine.readTagged(taggedFile)
+    newKeys = None
+    if liveFilename:
+        liveDict = DiffEngine.readTagged(liveFilename)
+        newKeys = {key for key in entries if key not in liveDict}
+
+    # One row per distinct normalized text
+    rowsByText = {}
+    keysByRow = []
+    for key, text in entries.items():
+        normalized = normalizeForMatching(text)
+        if not normalized.strip():
             continue
-        liveAndPtsGreaterThanThreshold = calculate_similarity_and_threshold(liveText, ptsText)
-        if liveText == ptsText:
-            matchedCount = matchedCount + 1
-            lineOut = '{{{{{}:}}}}{}\n'.format(key, ptsText)
-            matchedText.append(lineOut)
-        elif liveAndPtsGreaterThanThreshold:
-            closMatchCount = closMatchCount + 1
-            lineOut = '{{{{{}:}}}}{}\n'.format(key, liveText)
-            closeMatchLiveText.append(lineOut)
-            lineOut = '{{{{{}:}}}}{}\n'.format(key, ptsText)
-            closeMatchPtsText.append(lineOut)
-        else:
-            changedCount = changedCount + 1
-            lineOut = '{{{{{}:pts:}}}}{}\n{{{{{}:live:}}}}{}\n\n'.format(key, ptsText, key, liveText)
-            changedText.append(lineOut)
-    for key in textUntranslatedLiveDict:
-        liveText = textUntranslatedLiveDict.get(key)
-        if textUntranslatedPTSDict.get(key) is None:
-            deletedCount = deletedCount + 1
-            lineOut = '{{{{{}:}}}}{}\n'.format(key, liveText)
-            deletedText.append(lineOut)
-    print('{}: new indexes added'.format(addedIndexCount))
-    print('{}: indexes matched'.format(matchedCount))
-    print('{}: indexes were a close match'.format(closMatchCount))
-    print('{}: indexes changed'.format(changedCount))
-    print('{}: indexes deleted'.format(deletedCount))
-    # Write matched indexes
-    write_output_file("matchedIndexes.txt", matchedText, matchedCount, 'matched')
-    # Write close match Live indexes
-    write_output_file("closeMatchLiveIndexes.txt", closeMatchLiveText, closMatchCount, 'were a close match')
-    # Write close match PTS indexes
-    write_output_file("closeMatchPtsIndexes.txt", closeMatchPtsText, closMatchCount, 'were a close match')
-    # Write changed indexes
-    write_output_file("changedIndexes.txt", changedText, changedCount, 'changed')
-    # Write deleted indexes
-    write_output_file("deletedIndexes.txt", deletedText, deletedCount, 'deleted')
-    # Write added indexes
-    write_output_file("addedIndexes.txt", addedText, addedIndexCount, 'added')
+        row = rowsByText.get(normalized)
+        if row is None:
+            row = rowsByText[normalized] = len(keysByRow)
+            keysByRow.append([])
+        keysByRow[row].append(key)
+    texts = list(rowsByText)
+    del rowsByText
+
+    parents = list(range(len(texts)))
+    bestScores = [0.0] * len(texts)
+    index = LshIndex()
+    for row, text in enumerate(texts):
+        signature = minHashSignature(text)
+        for candidate in index.candidates(text, minSignatureMatch=duplicateMinSignatureMatch, signature=signature):
+            # Candidates already in the group of row add no new link
+            candidateRoot = findGroupRoot(parents, candidate)
+            if candidateRoot == findGroupRoot(parents, row):
+                continue
+            score = boundedSimilarityRatio(text, texts[candidate], threshold)
+            if score > threshold:
+                bestScores[row] = max(bestScores[row], score)
+                bestScores[candidate] = max(bestScores[candidate], score)
+                parents[findGroupRoot(parents, row)] = candidateRoot
+        index.add(row, text, signature)
+
+    groups = {}
+    for row in range(len(texts)):
+        groups.setdefault(findGroupRoot(parents, row), []).append(row)
+    groupList = []
+    for rows in groups.values():
+        keys = [(key, 1.0 if len(keysByRow[row]) > 1 else bestScores[row]) for row in rows for key in keysByRow[row]]
+        if len(keys) < 2:
+            continue
+        if newKeys is not None and not any(key in newKeys for key, score in keys):
+            continue
+        groupList.append(keys)
+    groupList.sort(key=lambda keys: (-len(keys), keys[0][0]))
+
+    with open(outputFile, 'w', encoding="utf8") as out:
+        for keys in groupList:
+            sectionNames = [get_section_key_by_id(int(key.split('-')[0])) or key.split('-')[0] for key, score in keys]
+            out.write('{} keys, {} sections, score {:.3f}\n'.format(
+                len(keys), len(set(sectionNames)), min(score for key, score in keys)))
+            for (key, score), sectionName in zip(keys, sectionNames):
+                out.write('{:.3f} {} {{{{{}:}}}}{}\n'.format(score, sectionName, key, entries[key].rstrip()))
+            out.write('\n')
+    print("{} groups with {} keys written to {}".format(
+        len(groupList), sum(len(keys) for keys in groupList), outputFile))
+
+
+# Pipelines -------------------------------------------------------------------
+"""
+A pipeline file lists steps that run in one process. Each step is a mapping with a single
+key, the stage name, whose value holds the stage options. Stages pass tagged entries
+(dicts of key -> text) to each other by name, so the intermediate output.txt files of the
+equivalent command chain are never written. Only writeTagged, writeText and compile write
+files.
+
+    steps:
+      - readLang: {file: en.lang, as: en}
+      - readTagged: {file: kr.lang_tag.txt, encoding: esokr, as: translated}
+      - readTagged: {file: en_prv.lang_tag.txt, as: live}
+      - diff: {translated: translated, live: live, pts: en, as: merged, verify: verify_output.txt}
+      - merge: {input: merged, section: lorebooks_kr.txt, as: merged}
+      - koreanToEso: {input: merged, as: merged}
+      - compile: {input: merged, template: en.lang, output: kr.lang}
+"""
+pipelineStages = {}
+
+
+def pipelineStage(name):
+    """Decorator to register a function as a pipeline stage."""
+    def register(func):
+        pipelineStages[name] = func
+        return func
+    return register
+
+
+@pipelineStage('readTagged')
+def readTaggedStage(context, file, encoding="utf8"):
+    entries = {}
+    readTaggedLangFile(file, entries, encoding)
+    return entries
+
+
+@pipelineStage('readLang')
+def readLangStage(context, file):
+    # Same entries as reading the combinedFile of exportLangToTagged with readTagged
+    table, _ = readLangFile(file)
+    entries = {}
+    for row, (secId, secIdx, strIdx) in enumerate(zip(table.sectionIds, table.sectionIndexes, table.stringIndexes)):
+        maLangIndex = reLangIndex.match(formatTaggedLine(secId, secIdx, strIdx, table.getString(row)))
+        if maLangIndex:
+            entries[maLangIndex.group(1)] = maLangIndex.group(2)
+    return entries
+
+
+@pipelineStage('addIndex')
+def addIndexStage(context, file, ids):
+    with open(file, 'r', encoding="utf8") as textIns:
+        textLines = [line.rstrip() for line in textIns]
+    with open(ids, 'r', encoding="utf8") as idIns:
+        idLines = [line.strip() for line in idIns]
+    if len(textLines) != len(idLines):
+        raise ValueError("Number of lines in {} and {} do not match".format(file, ids))
+    return dict(zip(idLines, textLines))
+
+
+@pipelineStage('diff')
+def diffStage(context, translated, live, pts, verify=None, jobs=1):
+    result = DiffEngine(jobs).diffIndexed(context[translated], context[live], context[pts])
+    if verify is not None:
+        with open(verify, 'w', encoding="utf8") as verifyOut:
+            result.writeVerify(verifyOut)
+    return result.texts()
+
+
+@pipelineStage('merge')
+def mergeStage(context, input, section):
+    entries = dict(context[input])
+    sectionEntries = context[section] if section in context else readTaggedStage(context, section)
+    for key, text in sectionEntries.items():
+        if key in entries:
+            entries[key] = text
+    return entries
+
+
+@pipelineStage('koreanToEso')
+def koreanToEsoStage(context, input):
+    return {key: text.translate(koreanToEsoTable) for key, text in context[input].items()}
+
+
+@pipelineStage('esoToKorean')
+def esoToKoreanStage(context, input):
+    return {key: text.translate(esoToKoreanTable) for key, text in context[input].items()}
+
+
+@pipelineStage('compile')
+def compileStage(context, input, template, output="output.lang"):
+    appliedCount, unknownCount = compileTaggedEntriesToLang(context[input].items(), template, output)
+    if unknownCount:
+        print("{}: entries not found in {} were skipped".format(unknownCount, template))
+    print("Compiled {} entries into {}".format(appliedCount, output))
+
+
+@pipelineStage('writeTagged')
+def writeTaggedStage(context, input, file="output.txt", encoding="utf8"):
+    writeTaggedEntries(context[input], file, encoding)
+
+
+@pipelineStage('writeText')
+def writeTextStage(context, input, file="output.txt", encoding="utf8"):
+    with open(file, 'w', encoding=encoding) as out:
+        out.writelines('{}\n'.format(text) for text in context[input].values())
+
+
+def runPipelineSteps(steps, context=None):
+    """
+    Run pipeline steps and return the context of named results.
+
+    Args:
+        steps (list): Mappings of stage name -> options, as read from a pipeline file.
+        context (dict, optional): Named tagged entries available to the first step.
+
+    Returns:
+        dict: The context after the last step.
+    """
+    if context is None:
+        context = {}
+    for stepNumber, step in enumerate(steps, 1):
+        if not isinstance(step, dict) or len(step) != 1:
+            raise ValueError("Step {}: expected a single stage name, got {!r}".format(stepNumber, step))
+        (stageName, options), = step.items()
+        stage = pipelineStages.get(stageName)
+        if stage is None:
+            raise ValueError("Step {}: unknown stage {}".format(stepNumber, stageName))
+        options = dict(options or {})
+        resultName = options.pop('as', None)
+        parameters = list(inspect.signature(stage).parameters.values())[1:]
+        unknownOptions = sorted(set(options) - {parameter.name for parameter in parameters})
+        if unknownOptions:
+            raise ValueError("Step {}: unknown option {} for stage {}".format(
+                stepNumber, ", ".join(unknownOptions), stageName))
+        missingOptions = [parameter.name for parameter in parameters
+                          if parameter.default is parameter.empty and parameter.name not in options]
+        if missingOptions:
+            raise ValueError("Step {}: stage {} needs option {}".format(
+                stepNumber, stageName, ", ".join(missingOptions)))
+        startTime = time.perf_counter()
+        result = stage(context, **options)
+        if resultName is not None:
+            context[resultName] = result
+        print("Step {} {}: {:.2f}s".format(stepNumber, stageName, time.perf_counter() - startTime))
+    return context
+
+
+@mainFunction
+def runPipeline(pipelineFile):
+    """
+    Run a sequence of operations from a YAML pipeline file in one process.
+
+    Args:
+        pipelineFile (str): The YAML file with a 'steps' list.
+
+    Notes:
+        - Steps read tagged files (readTagged, readLang, addIndex), transform entries in memory
+          (diff, merge, koreanToEso, esoToKorean) and write results (writeTagged, writeText, compile).
+        - 'as' names the result of a step. Later steps refer to it by that name.
+        - diff uses the same rules as diffIndexedLangText, merge those of mergeExtractedSectionIntoLang,
+          and compile those of compileTaggedToLang.
+
+    Example:
+        ```
+        steps:
+          - readTagged: {file: kr.lang_tag.txt, encoding: esokr, as: translated}
+          - readTagged: {file: en_prv.lang_tag.txt, as: live}
+          - readLang: {file: en.lang, as: pts}
+          - diff: {translated: translated, live: live, pts: pts, as: merged}
+          - koreanToEso: {input: merged, as: merged}
+          - compile: {input: merged, template: en.lang, output: kr.lang}
+        ```
+    """
+    yaml = ruamel.yaml.YAML(typ='safe')
+    with open(pipelineFile, 'r', encoding="utf8") as pipelineIns:
+        spec = yaml.load(pipelineIns) or {}
+    runPipelineSteps(spec.get('steps', []))
 
 
 @mainFunction
@@ -1920,6 +3996,90 @@ def apply_byte_offset_to_hangul(input_filename):
         output_file.write(converted_text)
 
 
+@mainFunction
+def test_hangul_mapping():
+    """
+    Check that every code point of the Hangul blocks round-trips through koreanToEso and esoToKorean.
+
+    Every code point of the Hangul Jamo, Compatibility Jamo and Syllables blocks, and every ESO range
+    code point, is converted both ways and compared with the legacy UTF-8 byte offsets. The time for
+    the table lookup and for the legacy byte math is printed for comparison.
+    """
+    failures = 0
+    codePoints = [codePoint for first, last, name in hangulBlocks for codePoint in range(first, last + 1)]
+    for codePoint in codePoints:
+        char = chr(codePoint)
+        esoChar = koreanToEsoChar(char)
+        if esoToKoreanChar(esoChar) != char:
+            print("U+{:04X} does not round-trip (ESO U+{:04X})".format(codePoint, ord(esoChar)))
+            failures += 1
+        legacyChar = legacyConvertChar(char, legacyKoreanToEsoValue)
+        if legacyChar is not None and legacyChar != esoChar:
+            print("U+{:04X} maps to U+{:04X}, legacy offsets give U+{:04X}".format(codePoint, ord(esoChar),
+                                                                                  ord(legacyChar)))
+            failures += 1
+
+    esoCodePoints = [codePoint for first, last, offset in hangulEsoRanges
+                     for codePoint in range(first + offset, last + offset + 1)]
+    for codePoint in esoCodePoints:
+        char = chr(codePoint)
+        if koreanToEsoChar(esoToKoreanChar(char)) != char:
+            print("ESO U+{:04X} does not round-trip".format(codePoint))
+            failures += 1
+        if legacyConvertChar(char, legacyEsoToKoreanValue) != esoToKoreanChar(char):
+            print("ESO U+{:04X} does not match the legacy offsets".format(codePoint))
+            failures += 1
+
+    sample = ''.join(map(chr, codePoints)) * 20
+    start = time.perf_counter()
+    sample.translate(koreanToEsoTable).translate(esoToKoreanTable)
+    tableTime = time.perf_counter() - start
+    start = time.perf_counter()
+    for char in sample:
+        legacyConvertChar(legacyConvertChar(char, legacyKoreanToEsoValue) or char, legacyEsoToKoreanValue)
+    legacyTime = time.perf_counter() - start
+
+    print("Checked {} Hangul and {} ESO code points: {} failures".format(len(codePoints), len(esoCodePoints), failures))
+    print("Round trip of {} characters: table {:.4f}s, legacy byte offsets {:.4f}s".format(len(sample), tableTime,
+                                                                                        legacyTime))
+    return failures == 0
+
+
+@mainFunction
+def test_str_line_parser(strFilename):
+    """
+    Compare parseStrLine with the regular expressions it replaces on a .str file.
+
+    Every line is classified by parseStrLine and by parseStrLineRegex, as read and with trailing
+    whitespace removed. Differences are printed, followed by the time each method took.
+
+    Args:
+        strFilename (str): The .str file to check (e.g., master.kb_client.str).
+    """
+    with open(strFilename, 'r', encoding="utf8") as textIns:
+        lines = textIns.readlines()
+    lines += [line.rstrip() for line in lines]
+
+    mismatches = 0
+    for line in lines:
+        if parseStrLine(line) != parseStrLineRegex(line):
+            print("Mismatch: {!r}".format(line))
+            mismatches += 1
+
+    start = time.perf_counter()
+    for line in lines:
+        parseStrLine(line)
+    parserTime = time.perf_counter() - start
+    start = time.perf_counter()
+    for line in lines:
+        parseStrLineRegex(line)
+    regexTime = time.perf_counter() - start
+
+    print("Checked {} lines: {} mismatches".format(len(lines), mismatches))
+    print("parseStrLine {:.4f}s, regular expressions {:.4f}s".format(parserTime, regexTime))
+    return mismatches == 0
+
+
 @mainFunction
 def test_section_functions():
     section_key = 'section_unknown_1'